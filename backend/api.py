@@ -2,47 +2,145 @@
 Flask API backend for RideSmart React frontend
 Exposes Python functions as REST API endpoints
 """
-from flask import Flask, jsonify, request, Response, stream_with_context
-from flask_cors import CORS
-from src.search_ride import search_ride
-from src.book_ride import book_ride
+from flask import Flask, abort, jsonify, request, Response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
+from src.search_ride import search_ride, classify_proposals
+from src.book_ride import book_ride, booked_ride_id
 from src.cancel_ride import cancel_ride
-from src.get_route import get_route
-from src import config
-from src.destination_config import LOCATIONS, get_location_pair
-from src.users import list_users, get_user, get_auth_token, get_user_id, USERS
-from src.lyft_orchestrator import LyftOrchestrator
+from src.config import default_origin as DEFAULT_ORIGIN, default_destination as DEFAULT_DESTINATION
+from src.destination_config import ROUTE_SUMMARIES, UnknownLocationError, get_location_pair, reload_route_summaries
+from src.users import list_users, USERS
 from src.logger import log_booking, log_lyft_orchestrator, log_search
 from src.booking_state import booking_state
+from src.broadcast import KEEPALIVE_INTERVAL
 from src.developer_logs import developer_logs
 from src.developer_logs_db import get_storage_info
 from src.reverse_geocode import reverse_geocode
-import json
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import math
 import queue
 import threading
 import time
+import uuid
+import orjson
 
 # ── Global state for SSE reconnection ────────────────────────────────────────
-# Keeps a log buffer + subscriber list for the most recent orchestrator run so
+# Keeps a log buffer + subscriber set for the most recent orchestrator run so
 # mobile clients that get dropped (iOS "Load failed") can reconnect and resume.
 _current_run = {
     'logs': [],        # all log lines emitted so far
     'result': None,    # final result dict, or None
     'done': False,     # True once orchestrator finished
-    'subscribers': [], # queue.Queue objects waiting for live events
+    'subscribers': set(), # _LogChannel objects waiting for live events
 }
 _current_run_lock = threading.Lock()
 
 _current_orchestrator = None
 _current_orchestrator_lock = threading.Lock()
 
+# ── Orchestrator jobs ────────────────────────────────────────────────────────
+# Runs execute on a shared pool instead of a fresh thread per request. Each run
+# is registered under a job id (sent back as X-Job-Id) so its outcome can also
+# be polled via GET /api/lyft/status/<job_id>. Only the most recent jobs are kept.
+# A run that cannot get a worker right away is refused with 503 instead of
+# sitting in the executor's queue while its client watches an empty stream.
+_MAX_ORCHESTRATOR_RUNS = 8
+_ORCHESTRATOR_EXECUTOR = ThreadPoolExecutor(max_workers=_MAX_ORCHESTRATOR_RUNS, thread_name_prefix='lyft-orchestrator')
+_orchestrator_slots = threading.BoundedSemaphore(_MAX_ORCHESTRATOR_RUNS)
+# Emergency filler cancellations started from a stream run here, so the stream
+# can report and finish without waiting on N cancel calls.
+_LYFT_CLEANUP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='lyft-cleanup')
+_MAX_LYFT_JOBS = 50
+_lyft_jobs = {}  # job_id -> {'user_key', 'started_at', 'future', 'status', 'outcome'}
+_lyft_jobs_lock = threading.Lock()
 
-class _FanoutQueue(queue.Queue):
-    """Queue that also fans out items to _current_run for reconnection support."""
 
-    def put(self, item, block=True, timeout=None):
-        super().put(item, block=block, timeout=timeout)
+def _register_lyft_job(user_key):
+    """Create a job record for a new orchestrator run, evicting the oldest beyond the cap."""
+    job_id = uuid.uuid4().hex
+    job = {'user_key': user_key, 'started_at': time.time(), 'future': None, 'status': 'running', 'outcome': None}
+    with _lyft_jobs_lock:
+        _lyft_jobs[job_id] = job
+        while len(_lyft_jobs) > _MAX_LYFT_JOBS:
+            del _lyft_jobs[next(iter(_lyft_jobs))]
+    return job_id, job
+
+
+class _LogChannel:
+    """
+    Single-consumer message channel for an SSE stream: a deque plus an Event.
+
+    append/popleft are atomic, so producers need no lock, and the Event only
+    wakes the consumer when it has drained everything. maxsize (0 = unbounded)
+    makes put_nowait raise queue.Full like Queue.put_nowait.
+    """
+
+    def __init__(self, maxsize=0):
+        self._items = deque()
+        self._ready = threading.Event()
+        self._maxsize = maxsize
+        self._woken = False
+
+    def get(self, timeout=None):
+        """
+        Pop the next item, waiting up to timeout seconds. Raises queue.Empty like
+        Queue.get on timeout, and also when woken by wake() with nothing queued.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._items.popleft()
+            except IndexError:
+                pass
+            if self._woken:
+                self._woken = False
+                raise queue.Empty
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not self._ready.wait(remaining):
+                raise queue.Empty
+            # Items are appended before the Event is set, so clearing here
+            # cannot lose one: the next popleft sees it.
+            self._ready.clear()
+
+    def get_nowait(self):
+        """Pop the next item without waiting; raises queue.Empty if there is none."""
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise queue.Empty from None
+
+    def put_nowait(self, item):
+        if self._maxsize and len(self._items) >= self._maxsize:
+            raise queue.Full
+        self._items.append(item)
+        self._ready.set()
+
+    def wake(self):
+        """End a pending get() early (e.g. when the run's future completes)."""
+        self._woken = True
+        self._ready.set()
+
+
+class _FanoutQueue(_LogChannel):
+    """
+    Log channel from one orchestrator run to its /api/lyft/run stream that also
+    fans out items to _current_run for reconnection support.
+    """
+
+    def __init__(self, job=None):
+        super().__init__()
+        self.job = job
+
+    def put(self, item):
+        self.put_nowait(item)
         msg_type, content = item
+        if self.job is not None and msg_type != 'log':
+            # 'result' or 'error' is terminal; record it for /api/lyft/status
+            self.job['status'] = msg_type
+            self.job['outcome'] = content
         with _current_run_lock:
             if msg_type == 'log':
                 _current_run['logs'].append(content)
@@ -50,7 +148,7 @@ class _FanoutQueue(queue.Queue):
                 _current_run['done'] = True
                 if msg_type == 'result':
                     _current_run['result'] = content
-            for q in list(_current_run['subscribers']):
+            for q in _current_run['subscribers']:
                 try:
                     q.put_nowait(item)
                 except (queue.Full, Exception):
@@ -58,8 +156,53 @@ class _FanoutQueue(queue.Queue):
             if msg_type != 'log':
                 _current_run['subscribers'].clear()
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that parses and serializes with orjson instead of the stdlib json module.
+
+    jsonify() goes through response() and request.get_json() goes through loads(),
+    so every endpoint picks this up without changing its call sites.
+    Non-str dict keys (e.g. int ride ids) are allowed.
+    """
+
+    option = orjson.OPT_NON_STR_KEYS
+    # orjson never sorts keys or indents; keep the inherited flags in line with that
+    # so nothing built on DefaultJSONProvider's defaults expects sorted/pretty output.
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        # orjson accepts the raw request bytes directly (no decode to str first).
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype,
+        )
+
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for React frontend
+app.json = OrjsonProvider(app)
+
+
+@app.after_request
+def _cors_headers(response):
+    """Enable CORS for the React frontend (any origin, same policy flask-cors applied)."""
+    headers = response.headers
+    headers['Access-Control-Allow-Origin'] = '*'
+    headers['Access-Control-Expose-Headers'] = 'X-Job-Id'
+    if request.method == 'OPTIONS':
+        # Preflight: Flask answers OPTIONS for every route automatically.
+        # Browsers may reuse it for a day (Chromium caps this at 2 hours).
+        headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        headers['Access-Control-Max-Age'] = '86400'
+    return response
+
 
 # Initialize server-owned booking state with known users (safe if USERS is empty).
 try:
@@ -67,135 +210,374 @@ try:
 except Exception as e:
     print(f"Warning: could not init booking state users: {e}")
 
+
+def _static_json(payload):
+    """Encode a payload that never changes at runtime once; returns (body, etag)."""
+    body = orjson.dumps(payload)
+    return body, hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def _static_response(static_json, max_age=300):
+    """
+    Build a cacheable JSON response from a pre-encoded (body, etag) pair.
+
+    A fresh Response is built per request; make_conditional turns it into a
+    304 with no body when the client's If-None-Match matches.
+    """
+    body, etag = static_json
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, stale-while-revalidate=3600'
+    return response.make_conditional(request)
+
+
+ResolvedRequest = namedtuple('ResolvedRequest', 'origin destination user_key auth_token user_id user_name')
+
+
+def _user_fields(user_key):
+    """Return (auth_token, user_id, name) for user_key with a single USERS lookup."""
+    user = USERS.get(user_key) if user_key else None
+    if user is None:
+        return None, None, None
+    return user.get('auth_token'), user.get('user_id'), user.get('name')
+
+
+def _resolve_request(data):
+    """
+    Resolve origin/destination, user credentials and display name from a request body in one pass.
+
+    A route_id takes precedence over custom origin/destination; anything missing
+    falls back to the config defaults. Raises UnknownLocationError for an unknown
+    route_id (answered with a 400 by the error handler below).
+    """
+    origin, destination = _resolve_locations(data)
+    user_key = data.get('user_id')
+    return ResolvedRequest(origin, destination, user_key, *_user_fields(user_key))
+
+
+def _resolve_locations(data):
+    """(origin, destination) for a request body, without the user lookup of _resolve_request."""
+    if 'route_id' in data:
+        return get_location_pair(data['route_id'])
+    return data.get('origin', DEFAULT_ORIGIN), data.get('destination', DEFAULT_DESTINATION)
+
+
+def _json_body():
+    """Request body as a non-empty JSON object; aborts with 400 "No data provided" otherwise."""
+    data = request.get_json()
+    if not data or not isinstance(data, dict):
+        abort(400, description="No data provided")
+    return data
+
+
+def _require(data, *fields, message=None):
+    """
+    Return the values of required fields from a request body (a single value for
+    one field, a tuple otherwise). Aborts with 400 on the first missing or empty
+    field, using message if given or "Missing <field>".
+    """
+    values = tuple(data.get(field) for field in fields)
+    for field, value in zip(fields, values):
+        if not value:
+            abort(400, description=message or f"Missing {field}")
+    return values[0] if len(values) == 1 else values
+
+
+# Endpoints whose per-user status should flip to "error" if they raise.
+_STATUS_ENDPOINTS = frozenset({'search', 'book', 'cancel'})
+
+
+def _lyft_preserved_result(orchestrator, message):
+    """Result for a run that failed after booking the Lyft ride, which is kept."""
+    ride_id = orchestrator.original_lyft_booking['ride_id']
+    return {
+        'success': True,
+        'lyft_booking': {'prescheduled_recurring_series_rides': [{'id': ride_id}]},
+        'message': message,
+    }
+
+
+# Run-stream SSE frames have a fixed envelope, so only the message/data is
+# encoded per frame and spliced between pre-built bytes; the output is the same
+# as encoding the whole {"type": ..., ...} dict.
+_LOG_FRAME_PREFIX = b'data: {"type":"log","message":'
+_RESULT_FRAME_PREFIX = b'data: {"type":"result","data":'
+_ERROR_FRAME_PREFIX = b'data: {"type":"error","message":'
+_FRAME_SUFFIX = b"}\n\n"
+
+
+def _log_frame(message):
+    return _LOG_FRAME_PREFIX + orjson.dumps(message) + _FRAME_SUFFIX
+
+
+def _result_frame(data):
+    return _RESULT_FRAME_PREFIX + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + _FRAME_SUFFIX
+
+
+def _error_frame(message):
+    return _ERROR_FRAME_PREFIX + orjson.dumps(message) + _FRAME_SUFFIX
+
+
+# Most log frames written to a stream in one chunk when the orchestrator logs in bursts.
+_SSE_BATCH_MAX = 32
+
+
+def _drain_frames(item, channel):
+    """
+    Encode item plus whatever is already queued behind it on channel (up to
+    _SSE_BATCH_MAX frames) as one chunk, so a burst of log lines costs one
+    yield/write instead of one per line. Each message keeps its own frame.
+
+    Returns (chunk, finished); finished is True once a result/error frame was
+    included, which is always the last thing a run puts.
+    """
+    frames = []
+    while True:
+        msg_type, content = item
+        if msg_type == 'log':
+            frames.append(_log_frame(content))
+        elif msg_type == 'result':
+            frames.append(_result_frame(content))
+            return b"".join(frames), True
+        elif msg_type == 'error':
+            frames.append(_error_frame(content))
+            return b"".join(frames), True
+        if len(frames) >= _SSE_BATCH_MAX:
+            break
+        try:
+            item = channel.get_nowait()
+        except queue.Empty:
+            break
+    return b"".join(frames), False
+
+
+# Headers shared by every SSE response (no-cache, and no proxy buffering).
+_SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+    'Connection': 'keep-alive',
+}
+
+
+# Fixed frames, encoded once and yielded as-is by every stream.
+_KEEPALIVE_FRAME = b": keepalive\n\n"
+# Sent first on every stream: a 2 KB comment fills the initial buffer some
+# proxies hold back before they start forwarding, so early events go out at once.
+_PADDING_FRAME = b":" + b" " * 2048 + b"\n\n"
+_NO_RESULT_FRAME = _error_frame('Run finished with no result')
+
+
+def _emergency_frame(orchestrator, reason):
+    """
+    Final frame for a /api/lyft/run stream that cannot finish normally.
+
+    Starts cancelling the run's filler bookings in the background (the Lyft
+    booking is kept) and reports the outcome: a result if the Lyft ride was
+    booked, otherwise an error. reason starts the message, e.g. "Stream error: ...".
+    """
+    if orchestrator is None:
+        return _error_frame(f'{reason}.')
+    try:
+        _LYFT_CLEANUP_EXECUTOR.submit(orchestrator._cancel_all_filler_bookings)
+        if orchestrator.original_lyft_booking:
+            message = f'{reason}, but Lyft booking is preserved. Filler bookings are being cancelled.'
+            return _result_frame(_lyft_preserved_result(orchestrator, message))
+        return _error_frame(f'{reason}. All filler bookings are being cancelled.')
+    except Exception:
+        return _error_frame(f'{reason}. Attempted to cancel filler bookings.')
+
+
+def _snapshot_stream(store, last_event_id=None):
+    """
+    SSE frames for a store that publishes full snapshots on store.channel
+    (booking_state, developer_logs).
+
+    Sends the current snapshot first, unless the client's Last-Event-ID shows it
+    already has the latest one, then the newest snapshot each time the channel
+    moves. Intermediate snapshots a slow client missed are skipped since each one
+    supersedes the last. Nothing to unsubscribe when the client disconnects.
+    """
+    channel = store.channel
+    cursor = channel.seq  # read before encoding so no publish in between is missed
+    if last_event_id != channel.event_id(cursor):
+        yield _PADDING_FRAME + channel.frame(cursor, store.encode_snapshot())
+    else:
+        yield _PADDING_FRAME
+    while True:
+        # Woken by a publish or by the shared keepalive tick (every 25s); the
+        # 60s timeout is only a safety net.
+        events = channel.wait(cursor, timeout=60, keepalive=True)
+        if not events:
+            # keepalive (prevents some proxies from closing idle connections)
+            yield _KEEPALIVE_FRAME
+            continue
+        cursor, frame = events[-1]  # pre-encoded once at publish, shared by every stream
+        yield frame
+
+
+def _ojson(payload, status=200):
+    """JSON response encoded straight with orjson, skipping jsonify's provider dispatch."""
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS), status=status, mimetype='application/json'
+    )
+
+
+# Bodies for the fixed error messages, encoded once. Responses themselves are
+# still built per request (after_request adds headers to them).
+_ERROR_BODIES = {
+    message: orjson.dumps({"error": message})
+    for message in (
+        "No data provided",
+        "Missing required fields",
+        "Missing ride_id",
+        "Missing route_identifier",
+        "Missing original_user",
+        "Missing user_id",
+        "Missing lat or lng query parameters",
+        "Invalid wait parameter",
+        "Reverse geocoding failed",
+        "Search failed",
+        "Booking failed",
+        "Cancellation failed",
+        "Failed to get route",
+        "No active orchestrator run",
+        "busy",
+    )
+}
+
+
+def _json_error(message, status):
+    body = _ERROR_BODIES.get(message)
+    if body is None:
+        return _ojson({"error": message}, status)
+    return Response(body, status=status, mimetype='application/json')
+
+
+@app.errorhandler(UnknownLocationError)
+def _unknown_location(e):
+    return _json_error(f"Route '{e.location_name}' not found", 400)
+
+
+@app.errorhandler(Exception)
+def _unhandled_error(e):
+    """Single error path for all endpoints: JSON body, 500 unless it's an HTTP error."""
+    if isinstance(e, HTTPException):
+        return _json_error(e.description, e.code)
+    if request.endpoint in _STATUS_ENDPOINTS:
+        # Don't fail status updates on errors, but try.
+        try:
+            user_key = (request.get_json(silent=True) or {}).get('user_id')
+            if user_key:
+                booking_state.set_status(user_key, "error", str(e))
+        except Exception:
+            pass
+    return _json_error(str(e), 500)
+
+
+_INDEX_JSON = _static_json({
+    "status": "ok",
+    "message": "RideSmart API is running",
+    "endpoints": [
+        "GET  /api/reverse-geocode",
+        "GET  /api/config",
+        "GET  /api/routes",
+        "GET  /api/users",
+        "POST /api/search",
+        "POST /api/book",
+        "POST /api/cancel",
+        "GET  /api/status",
+        "GET  /api/status/stream",
+        "POST /api/lyft/run",
+        "GET  /api/lyft/reconnect",
+        "GET  /api/lyft/status/<job_id>",
+        "POST /api/lyft/check",
+        "GET  /api/developer/stream",
+        "GET  /api/developer/snapshot",
+        "GET  /api/developer/storage",
+        "POST /api/developer/access"
+    ]
+})
+
+
 @app.route('/')
 def index():
     """Health check / API info"""
-    return jsonify({
-        "status": "ok",
-        "message": "RideSmart API is running",
-        "endpoints": [
-            "GET  /api/reverse-geocode",
-            "GET  /api/config",
-            "GET  /api/routes",
-            "GET  /api/users",
-            "POST /api/search",
-            "POST /api/book",
-            "POST /api/cancel",
-            "GET  /api/status",
-            "GET  /api/status/stream",
-            "POST /api/lyft/run",
-            "GET  /api/lyft/reconnect",
-            "POST /api/lyft/check",
-            "GET  /api/developer/stream",
-            "GET  /api/developer/snapshot",
-            "GET  /api/developer/storage",
-            "POST /api/developer/access"
-        ]
-    })
+    return _static_response(_INDEX_JSON)
 
 
 # --- Developer logs (real-time ride log + user access log) ---
 @app.route('/api/developer/stream', methods=['GET'])
 def developer_stream():
     """Server-Sent Events stream of developer logs (ride log + user access log)."""
-    subscriber_q = developer_logs.subscribe()
-
-    def generate():
-        try:
-            while True:
-                try:
-                    payload = subscriber_q.get(timeout=10)
-                    yield f"data: {payload}\n\n"
-                except queue.Empty:
-                    yield ": keepalive\n\n"
-        except GeneratorExit:
-            developer_logs.unsubscribe(subscriber_q)
-            raise
-        except Exception:
-            developer_logs.unsubscribe(subscriber_q)
-            raise
+    generate = _snapshot_stream(developer_logs, request.headers.get('Last-Event-ID'))
 
     return Response(
-        stream_with_context(generate()),
+        generate,
         mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no',
-            'Connection': 'keep-alive'
-        }
+        headers=_SSE_HEADERS
     )
 
 
 @app.route('/api/developer/snapshot', methods=['GET'])
 def developer_snapshot():
     """One-off snapshot of developer logs."""
-    try:
-        return jsonify(developer_logs.snapshot())
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify(developer_logs.snapshot())
 
 
 @app.route('/api/developer/access', methods=['POST', 'GET'])
 def developer_access():
     """Record a website access (IP, time, user-agent). Called by frontend on load."""
-    try:
-        ip = request.remote_addr or ""
-        user_agent = request.headers.get("User-Agent") or ""
-        path = request.args.get("path") or request.path or "/"
-        developer_logs.append_access(ip=ip, user_agent=user_agent, path=path)
-        return jsonify({"ok": True})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    ip = request.remote_addr or ""
+    user_agent = request.headers.get("User-Agent") or ""
+    path = request.args.get("path") or request.path or "/"
+    developer_logs.append_access(ip=ip, user_agent=user_agent, path=path)
+    return jsonify({"ok": True})
 
 
 @app.route('/api/developer/storage', methods=['GET'])
 def developer_storage():
     """Return which DB is used for developer logs (postgres = persists; sqlite on Vercel does not)."""
-    try:
-        return jsonify(get_storage_info())
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify(get_storage_info())
 
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
-    """Get server-owned booking status snapshot (all users)."""
-    try:
-        return jsonify(booking_state.snapshot())
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """
+    Get server-owned booking status snapshot (all users).
+
+    The ETag is the status channel's current event id. When the client already
+    has it (If-None-Match, or ?since=<etag>) the reply is a 304; with ?wait=<seconds>
+    (clamped to 0-25; nan/inf is a 400) the request long-polls until the status changes instead.
+    """
+    channel = booking_state.channel
+    seq = channel.seq
+    etag = channel.event_id(seq)
+    if request.args.get('since') == etag or request.if_none_match.contains(etag):
+        wait = request.args.get('wait', 0, type=float)
+        if not math.isfinite(wait):
+            # min(nan, 25) is nan, and a nan/inf timeout would wait forever
+            return _json_error("Invalid wait parameter", 400)
+        wait = max(0.0, min(wait, 25.0))
+        if wait <= 0 or not channel.wait(seq, timeout=wait):
+            not_modified = Response(status=304)
+            not_modified.set_etag(etag)
+            return not_modified
+        seq = channel.seq
+    response = jsonify(booking_state.snapshot())
+    response.set_etag(channel.event_id(seq))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @app.route('/api/status/stream', methods=['GET'])
 def stream_status():
     """Server-Sent Events stream of booking status snapshots."""
-    subscriber_q = booking_state.subscribe()
-
-    def generate():
-        try:
-            while True:
-                try:
-                    payload = subscriber_q.get(timeout=10)
-                    yield f"data: {payload}\n\n"
-                except queue.Empty:
-                    # keepalive (prevents some proxies from closing idle connections)
-                    yield ": keepalive\n\n"
-        except GeneratorExit:
-            # Client disconnected
-            booking_state.unsubscribe(subscriber_q)
-            raise
-        except Exception:
-            booking_state.unsubscribe(subscriber_q)
-            raise
+    generate = _snapshot_stream(booking_state, request.headers.get('Last-Event-ID'))
 
     return Response(
-        stream_with_context(generate()),
+        generate,
         mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no',
-            'Connection': 'keep-alive'
-        }
+        headers=_SSE_HEADERS
     )
 
 @app.route('/api/reverse-geocode', methods=['GET'])
@@ -204,11 +586,11 @@ def reverse_geocode_endpoint():
     lat = request.args.get('lat', type=float)
     lng = request.args.get('lng', type=float)
     if lat is None or lng is None:
-        return jsonify({"error": "Missing lat or lng query parameters"}), 400
+        return _json_error("Missing lat or lng query parameters", 400)
 
     result = reverse_geocode(lat, lng)
     if result is None:
-        return jsonify({"error": "Reverse geocoding failed"}), 500
+        return _json_error("Reverse geocoding failed", 500)
 
     addr = result["raw"].get("address", {})
     house = addr.get("house_number", "")
@@ -225,296 +607,216 @@ def reverse_geocode_endpoint():
 @app.route('/api/search', methods=['POST'])
 def search():
     """Search for available rides"""
-    try:
-        # Use default origin/destination from config
-        origin = config.default_origin
-        destination = config.default_destination
-        
-        # Allow custom origin/destination from request body if provided
-        data = request.get_json() or {}
-        if 'route_id' in data:
-            # Use route from destination_config
-            try:
-                origin, destination = get_location_pair(data['route_id'])
-            except ValueError:
-                return jsonify({"error": f"Route '{data['route_id']}' not found"}), 400
-        elif 'origin' in data:
-            origin = data['origin']
-        if 'destination' in data and 'route_id' not in data:
-            destination = data['destination']
-        
-        # Get user credentials if specified
-        user_key = data.get('user_id')
-        auth_token = get_auth_token(user_key) if user_key else None
-        user_id = get_user_id(user_key) if user_key else None
-        
-        # Get user name for logging
-        user_name = None
-        if user_key:
-            user = get_user(user_key)
-            user_name = user.get('name') if user else None
-        
-        response = search_ride(origin, destination, auth_token=auth_token, user_id=user_id)
-        
-        if response is None:
-            if user_key:
-                booking_state.set_status(user_key, "error", "search failed")
-            return jsonify({"error": "Search failed"}), 500
-        
-        # Log the search
-        proposal_count = len(response.get('proposals', []))
-        log_search(
-            user_key=user_key or 'default',
-            user_name=user_name,
-            route_id=data.get('route_id'),
-            origin=origin,
-            destination=destination,
-            proposal_count=proposal_count
-        )
+    # Route from destination_config, custom origin/destination, or config defaults
+    data = request.get_json() or {}
+    origin, destination, user_key, auth_token, user_id, user_name = _resolve_request(data)
+    
+    response = search_ride(origin, destination, auth_token=auth_token, user_id=user_id)
+    
+    if response is None:
         if user_key:
-            booking_state.set_status(user_key, "idle")
-        return jsonify(response)
-    except Exception as e:
-        # Don't fail status updates on errors, but try.
-        try:
-            data = request.get_json(silent=True) or {}
-            user_key = data.get('user_id')
-            if user_key:
-                booking_state.set_status(user_key, "error", str(e))
-        except Exception:
-            pass
-        return jsonify({"error": str(e)}), 500
+            booking_state.set_status(user_key, "error", "search failed")
+        return _json_error("Search failed", 500)
+    
+    # Log the search
+    proposal_count = len(response.get('proposals', []))
+    log_search(
+        user_key=user_key or 'default',
+        user_name=user_name,
+        route_id=data.get('route_id'),
+        origin=origin,
+        destination=destination,
+        proposal_count=proposal_count
+    )
+    if user_key:
+        booking_state.set_status(user_key, "idle")
+    return jsonify(response)
 
 @app.route('/api/book', methods=['POST'])
 def book():
     """Book a ride"""
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        prescheduled_ride_id = data.get('prescheduled_ride_id')
-        proposal_uuid = data.get('proposal_uuid')
-        origin = data.get('origin', config.default_origin)
-        destination = data.get('destination', config.default_destination)
-        
-        if not prescheduled_ride_id or not proposal_uuid:
-            return jsonify({"error": "Missing required fields"}), 400
-        
-        # Get user credentials if specified
-        user_key = data.get('user_id')
-        auth_token = get_auth_token(user_key) if user_key else None
-        user_id = get_user_id(user_key) if user_key else None
-        ride_type = data.get('ride_type')  # optional, helps status panel
-        
-        # Get user name for logging
-        user_name = None
-        if user_key:
-            user = get_user(user_key)
-            user_name = user.get('name') if user else None
-            booking_state.set_status(user_key, "booking", "booking ride...")
-        
-        response = book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, 
-                            auth_token=auth_token, user_id=user_id)
-        
-        if response is None:
-            # Log failed booking
-            log_booking(
-                action='book_failed',
-                user_key=user_key or 'default',
-                user_name=user_name,
-                prescheduled_ride_id=prescheduled_ride_id,
-                proposal_uuid=proposal_uuid,
-                origin=origin,
-                destination=destination
-            )
-            if user_key:
-                booking_state.set_status(user_key, "error", "booking failed")
-            return jsonify({"error": "Booking failed"}), 500
-        
-        # Extract ride ID from response
-        ride_id = None
-        if isinstance(response, dict):
-            rides = response.get('prescheduled_recurring_series_rides', [])
-            if rides:
-                ride_id = rides[0].get('id')
-
-        if user_key:
-            # Prefer the confirmed ride id from booking response, but fall back to the
-            # prescheduled_ride_id (the one shown in the UI/proposal) so we can still cancel.
-            tracked_ride_id = ride_id or prescheduled_ride_id
-            if tracked_ride_id:
-                booking_state.upsert_active_ride(
-                    user_key,
-                    ride_id=int(tracked_ride_id),
-                    ride_type=ride_type or "unknown",
-                    source="individual",
-                )
-            else:
-                booking_state.set_status(user_key, "booked", "booked (ride id unknown)")
-        
-        # Log successful booking
+    data = _json_body()
+    
+    prescheduled_ride_id, proposal_uuid = _require(
+        data, 'prescheduled_ride_id', 'proposal_uuid', message="Missing required fields"
+    )
+    origin = data.get('origin', DEFAULT_ORIGIN)
+    destination = data.get('destination', DEFAULT_DESTINATION)
+    
+    # Get user credentials if specified
+    user_key = data.get('user_id')
+    auth_token, user_id, user_name = _user_fields(user_key)
+    ride_type = data.get('ride_type')  # optional, helps status panel
+    
+    if user_key:
+        booking_state.set_status(user_key, "booking", "booking ride...")
+    
+    response = book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, 
+                        auth_token=auth_token, user_id=user_id)
+    
+    if response is None:
+        # Log failed booking
         log_booking(
-            action='book',
+            action='book_failed',
             user_key=user_key or 'default',
             user_name=user_name,
             prescheduled_ride_id=prescheduled_ride_id,
             proposal_uuid=proposal_uuid,
-            ride_id=ride_id,
             origin=origin,
             destination=destination
         )
-        # Developer ride log (individual booking)
-        try:
-            developer_logs.append_booking(
-                user_key=user_key or 'default',
-                user_name=user_name or user_key or 'unknown',
-                ride_id=int(ride_id) if ride_id is not None else None,
-                prescheduled_ride_id=int(prescheduled_ride_id) if prescheduled_ride_id is not None else None,
-                ride_type=ride_type or "RideSmart",
+        if user_key:
+            booking_state.set_status(user_key, "error", "booking failed")
+        return _json_error("Booking failed", 500)
+    
+    ride_id = booked_ride_id(response)
+
+    if user_key:
+        # Prefer the confirmed ride id from booking response, but fall back to the
+        # prescheduled_ride_id (the one shown in the UI/proposal) so we can still cancel.
+        tracked_ride_id = ride_id or prescheduled_ride_id
+        if tracked_ride_id:
+            booking_state.upsert_active_ride(
+                user_key,
+                ride_id=int(tracked_ride_id),
+                ride_type=ride_type or "unknown",
                 source="individual",
             )
-        except Exception:
-            pass
+        else:
+            booking_state.set_status(user_key, "booked", "booked (ride id unknown)")
+    
+    # Log successful booking
+    log_booking(
+        action='book',
+        user_key=user_key or 'default',
+        user_name=user_name,
+        prescheduled_ride_id=prescheduled_ride_id,
+        proposal_uuid=proposal_uuid,
+        ride_id=ride_id,
+        origin=origin,
+        destination=destination
+    )
+    # Developer ride log (individual booking)
+    try:
+        developer_logs.append_booking(
+            user_key=user_key or 'default',
+            user_name=user_name or user_key or 'unknown',
+            ride_id=ride_id,
+            prescheduled_ride_id=int(prescheduled_ride_id) if prescheduled_ride_id is not None else None,
+            ride_type=ride_type or "RideSmart",
+            source="individual",
+        )
+    except Exception:
+        pass
 
-        return jsonify(response)
-    except Exception as e:
-        try:
-            data = request.get_json(silent=True) or {}
-            user_key = data.get('user_id')
-            if user_key:
-                booking_state.set_status(user_key, "error", str(e))
-        except Exception:
-            pass
-        return jsonify({"error": str(e)}), 500
+    return jsonify(response)
 
 @app.route('/api/cancel', methods=['POST'])
 def cancel():
     """Cancel a ride"""
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        ride_id = data.get('ride_id')
-        if not ride_id:
-            return jsonify({"error": "Missing ride_id"}), 400
-        
-        # Get user credentials if specified
-        user_key = data.get('user_id')
-        auth_token = get_auth_token(user_key) if user_key else None
-        user_id = get_user_id(user_key) if user_key else None
-        
-        # Get user name for logging
-        user_name = None
-        if user_key:
-            user = get_user(user_key)
-            user_name = user.get('name') if user else None
-            booking_state.set_status(user_key, "cancelling", f"cancelling ride {ride_id}...")
-        
-        response = cancel_ride(ride_id, auth_token=auth_token, user_id=user_id)
-        
-        if response is None:
-            # External server did not confirm cancellation - do NOT mark as cancelled in developer log
-            log_booking(
-                action='cancel_failed',
-                user_key=user_key or 'default',
-                user_name=user_name,
-                ride_id=ride_id
-            )
-            if user_key:
-                booking_state.set_status(user_key, "error", "cancellation failed")
-            return jsonify({"error": "Cancellation failed"}), 500
-        
-        # Only here: external server confirmed cancellation (cancel_ride returned response)
+    data = _json_body()
+    
+    ride_id = _require(data, 'ride_id')
+    
+    # Get user credentials if specified
+    user_key = data.get('user_id')
+    auth_token, user_id, user_name = _user_fields(user_key)
+    
+    if user_key:
+        booking_state.set_status(user_key, "cancelling", f"cancelling ride {ride_id}...")
+    
+    response = cancel_ride(ride_id, auth_token=auth_token, user_id=user_id)
+    
+    if response is None:
+        # External server did not confirm cancellation - do NOT mark as cancelled in developer log
         log_booking(
-            action='cancel',
+            action='cancel_failed',
             user_key=user_key or 'default',
             user_name=user_name,
             ride_id=ride_id
         )
         if user_key:
-            booking_state.remove_active_ride(user_key, int(ride_id))
-        try:
-            # Developer log: show "Cancelled" only when external server confirmed
-            developer_logs.mark_cancelled(int(ride_id))
-        except Exception:
-            pass
-        return jsonify(response)
-    except Exception as e:
-        try:
-            data = request.get_json(silent=True) or {}
-            user_key = data.get('user_id')
-            if user_key:
-                booking_state.set_status(user_key, "error", str(e))
-        except Exception:
-            pass
-        return jsonify({"error": str(e)}), 500
+            booking_state.set_status(user_key, "error", "cancellation failed")
+        return _json_error("Cancellation failed", 500)
+    
+    # Only here: external server confirmed cancellation (cancel_ride returned response)
+    log_booking(
+        action='cancel',
+        user_key=user_key or 'default',
+        user_name=user_name,
+        ride_id=ride_id
+    )
+    if user_key:
+        booking_state.remove_active_ride(user_key, int(ride_id))
+    try:
+        # Developer log: show "Cancelled" only when external server confirmed
+        developer_logs.mark_cancelled(int(ride_id))
+    except Exception:
+        pass
+    return jsonify(response)
+
+_CONFIG_JSON = _static_json({
+    "origin": DEFAULT_ORIGIN,
+    "destination": DEFAULT_DESTINATION
+})
+
 
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get default origin and destination"""
-    try:
-        return jsonify({
-            "origin": config.default_origin,
-            "destination": config.default_destination
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return _static_response(_CONFIG_JSON)
 
 @app.route('/api/route/get', methods=['POST'])
 def get_ride_route():
     """Get the route for a booked ride"""
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        route_identifier = data.get('route_identifier')
-        if not route_identifier:
-            return jsonify({"error": "Missing route_identifier"}), 400
-        
-        response = get_route(route_identifier)
-        
-        if response is None:
-            return jsonify({"error": "Failed to get route"}), 500
-        
-        return jsonify(response)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    data = _json_body()
+    
+    route_identifier = _require(data, 'route_identifier')
+    
+    # Imported here like LyftOrchestrator: only the route map ever needs it
+    from src.get_route import get_route
+    response = get_route(route_identifier)
+    
+    if response is None:
+        return _json_error("Failed to get route", 500)
+    
+    return jsonify(response)
+
+# LOCATIONS is static for the life of the process, so the payload is encoded once.
+_ROUTES_JSON = _static_json({"routes": ROUTE_SUMMARIES})
+
 
 @app.route('/api/routes', methods=['GET'])
 def get_routes():
     """Get all available routes"""
-    try:
-        routes = []
-        for route_name, route_data in LOCATIONS.items():
-            origin = route_data.get("origin", {})
-            destination = route_data.get("destination", {})
-            routes.append({
-                "id": route_name,
-                "name": route_name.replace("_", " ").title(),
-                "origin": {
-                    "name": origin.get("geocoded_addr") or origin.get("full_geocoded_addr") or route_name.split("_to_")[0].replace("_", " ").title(),
-                    "data": origin
-                },
-                "destination": {
-                    "name": destination.get("geocoded_addr") or destination.get("full_geocoded_addr") or route_name.split("_to_")[-1].replace("_", " ").title(),
-                    "data": destination
-                }
-            })
-        return jsonify({"routes": routes})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return _static_response(_ROUTES_JSON, max_age=3600)
+
+# USERS is loaded from the environment once at import.
+_USERS_JSON = _static_json({"users": list_users()})
+
 
 @app.route('/api/users', methods=['GET'])
 def get_users():
     """Get all available users"""
-    try:
-        users = list_users()
-        return jsonify({"users": users})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return _static_response(_USERS_JSON)
+
+
+def reload_static_payloads():
+    """
+    Re-encode the cached /api/config, /api/routes and /api/users payloads (and
+    their ETags) after LOCATIONS or USERS were changed at runtime, e.g. by tests.
+
+    DEFAULT_ORIGIN/DEFAULT_DESTINATION are bound at import, so changing the
+    default route still needs a restart.
+    """
+    global _CONFIG_JSON, _ROUTES_JSON, _USERS_JSON
+    _CONFIG_JSON = _static_json({
+        "origin": DEFAULT_ORIGIN,
+        "destination": DEFAULT_DESTINATION
+    })
+    _ROUTES_JSON = _static_json({"routes": reload_route_summaries()})
+    _USERS_JSON = _static_json({"users": list_users()})
+
 
 @app.route('/api/lyft/run', methods=['POST'])
 def run_lyft_orchestrator():
@@ -529,328 +831,288 @@ def run_lyft_orchestrator():
     
     Returns Server-Sent Events stream with live logs and final result.
     """
+    data = _json_body()
+    
+    original_user = _require(data, 'original_user')
+    
+    if original_user not in USERS:
+        return _json_error(f"User '{original_user}' not found", 400)
+    
+    # Get origin/destination
+    origin, destination = _resolve_locations(data)
+    
+    if not _orchestrator_slots.acquire(blocking=False):
+        response = _json_error("busy", 503)
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    # Create a fan-out queue for log messages (also feeds reconnect subscribers)
+    job_id, job = _register_lyft_job(original_user)
+    log_queue = _FanoutQueue(job)
+    result_container = {'result': None}
+
+    # Reset shared run state so reconnect endpoint sees a fresh run
+    with _current_run_lock:
+        _current_run['logs'] = []
+        _current_run['result'] = None
+        _current_run['done'] = False
+        _current_run['subscribers'] = set()
+
+    # Create request log entry for this orchestrator run
+    original_user_name = USERS[original_user].get('name')
+    origin_latlng = origin.get('latlng', origin) if isinstance(origin, dict) else {}
+    dest_latlng = destination.get('latlng', destination) if isinstance(destination, dict) else {}
+    origin_lat = origin_latlng.get('lat') if isinstance(origin_latlng, dict) else None
+    origin_lng = origin_latlng.get('lng') if isinstance(origin_latlng, dict) else None
+    dest_lat = dest_latlng.get('lat') if isinstance(dest_latlng, dict) else None
+    dest_lng = dest_latlng.get('lng') if isinstance(dest_latlng, dict) else None
+    origin_addr = origin.get('geocoded_addr') or origin.get('full_geocoded_addr', '') if isinstance(origin, dict) else ''
+    dest_addr = destination.get('geocoded_addr') or destination.get('full_geocoded_addr', '') if isinstance(destination, dict) else ''
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        original_user = data.get('original_user')
-        if not original_user:
-            return jsonify({"error": "Missing original_user"}), 400
-        
-        if original_user not in USERS:
-            return jsonify({"error": f"User '{original_user}' not found"}), 400
-        
-        # Get origin/destination
-        if 'route_id' in data:
+        request_entry = developer_logs.append_request(
+            user_key=original_user,
+            user_name=original_user_name or original_user,
+            origin_lat=origin_lat,
+            origin_lng=origin_lng,
+            dest_lat=dest_lat,
+            dest_lng=dest_lng,
+            origin_addr=origin_addr,
+            dest_addr=dest_addr,
+        )
+        request_entry_id = request_entry.id
+    except Exception:
+        request_entry_id = None
+
+    log_lines = []
+
+    def log_callback(message):
+        """Callback function to send logs to the queue and accumulate for request log."""
+        log_lines.append(message)
+        if request_entry_id:
             try:
-                origin, destination = get_location_pair(data['route_id'])
-            except ValueError:
-                return jsonify({"error": f"Route '{data['route_id']}' not found"}), 400
-        else:
-            origin = data.get('origin', config.default_origin)
-            destination = data.get('destination', config.default_destination)
-        
-        # Create a fan-out queue for log messages (also feeds reconnect subscribers)
-        log_queue = _FanoutQueue()
-        result_container = {'result': None}
-
-        # Reset shared run state so reconnect endpoint sees a fresh run
-        with _current_run_lock:
-            _current_run['logs'] = []
-            _current_run['result'] = None
-            _current_run['done'] = False
-            _current_run['subscribers'] = []
-
-        # Create request log entry for this orchestrator run
-        original_user_obj_pre = get_user(original_user)
-        original_user_name_pre = original_user_obj_pre.get('name') if original_user_obj_pre else original_user
-        origin_latlng = origin.get('latlng', origin) if isinstance(origin, dict) else {}
-        dest_latlng = destination.get('latlng', destination) if isinstance(destination, dict) else {}
-        origin_lat = origin_latlng.get('lat') if isinstance(origin_latlng, dict) else None
-        origin_lng = origin_latlng.get('lng') if isinstance(origin_latlng, dict) else None
-        dest_lat = dest_latlng.get('lat') if isinstance(dest_latlng, dict) else None
-        dest_lng = dest_latlng.get('lng') if isinstance(dest_latlng, dict) else None
-        origin_addr = origin.get('geocoded_addr') or origin.get('full_geocoded_addr', '') if isinstance(origin, dict) else ''
-        dest_addr = destination.get('geocoded_addr') or destination.get('full_geocoded_addr', '') if isinstance(destination, dict) else ''
+                developer_logs.update_request_entry(request_entry_id, log_text="\n".join(log_lines))
+            except Exception:
+                pass
+        log_queue.put(('log', message))
+    
+    # Store orchestrator instance for emergency cleanup
+    orchestrator_instance = {'orchestrator': None}
+    
+    def run_orchestrator():
+        """Run the orchestrator in a separate thread."""
+        global _current_orchestrator
+        orchestrator = None
         try:
-            request_entry = developer_logs.append_request(
-                user_key=original_user,
-                user_name=original_user_name_pre,
-                origin_lat=origin_lat,
-                origin_lng=origin_lng,
-                dest_lat=dest_lat,
-                dest_lng=dest_lng,
-                origin_addr=origin_addr,
-                dest_addr=dest_addr,
+            # Log orchestrator start
+            log_lyft_orchestrator(
+                action='start',
+                original_user_key=original_user,
+                original_user_name=original_user_name,
+                route_id=data.get('route_id'),
+                origin=origin,
+                destination=destination
             )
-            request_entry_id = request_entry.id
-        except Exception:
-            request_entry_id = None
-
-        log_lines = []
-
-        def log_callback(message):
-            """Callback function to send logs to the queue and accumulate for request log."""
-            log_lines.append(message)
-            if request_entry_id:
-                try:
-                    developer_logs.update_request_entry(request_entry_id, log_text="\n".join(log_lines))
-                except Exception:
-                    pass
-            log_queue.put(('log', message))
-        
-        # Store orchestrator instance for emergency cleanup
-        orchestrator_instance = {'orchestrator': None}
-        
-        def run_orchestrator():
-            """Run the orchestrator in a separate thread."""
-            global _current_orchestrator
-            orchestrator = None
+            
+            # Imported here so cold starts that never run the orchestrator skip it
+            from src.lyft_orchestrator import LyftOrchestrator
+            orchestrator = LyftOrchestrator(original_user, origin, destination, log_callback=log_callback)
+            orchestrator_instance['orchestrator'] = orchestrator  # Store for emergency cleanup
+            with _current_orchestrator_lock:
+                _current_orchestrator = orchestrator
             try:
-                # Get user name for logging
-                original_user_obj = get_user(original_user)
-                original_user_name = original_user_obj.get('name') if original_user_obj else None
-                
-                # Log orchestrator start
-                route_info = data.get('route_id') or 'custom'
+                booking_state.set_status(original_user, "orchestrating", "running lyft orchestrator...")
+            except Exception:
+                pass
+            result = orchestrator.run()
+            result_container['result'] = result
+            
+            # Log orchestrator completion
+            if result.get('success'):
                 log_lyft_orchestrator(
-                    action='start',
+                    action='success',
                     original_user_key=original_user,
                     original_user_name=original_user_name,
                     route_id=data.get('route_id'),
-                    origin=origin,
-                    destination=destination
+                    lyft_booking=result.get('lyft_booking') is not None,
+                    filler_bookings_count=len(orchestrator.filler_bookings) if orchestrator else 0
                 )
-                
-                orchestrator = LyftOrchestrator(original_user, origin, destination, log_callback=log_callback)
-                orchestrator_instance['orchestrator'] = orchestrator  # Store for emergency cleanup
-                with _current_orchestrator_lock:
-                    _current_orchestrator = orchestrator
+            else:
+                log_lyft_orchestrator(
+                    action='failed',
+                    original_user_key=original_user,
+                    original_user_name=original_user_name,
+                    route_id=data.get('route_id'),
+                    message=result.get('message'),
+                    filler_bookings_count=len(orchestrator.filler_bookings) if orchestrator else 0
+                )
+            
+            # Finalize request log entry
+            if request_entry_id:
                 try:
-                    booking_state.set_status(original_user, "orchestrating", "running lyft orchestrator...")
+                    developer_logs.update_request_entry(
+                        request_entry_id,
+                        log_text="\n".join(log_lines),
+                        status="success" if result.get("success") else "failed",
+                        success=result.get("success", False),
+                        finished_at=time.time(),
+                    )
                 except Exception:
                     pass
-                result = orchestrator.run()
-                result_container['result'] = result
-                
-                # Log orchestrator completion
-                if result.get('success'):
-                    log_lyft_orchestrator(
-                        action='success',
-                        original_user_key=original_user,
-                        original_user_name=original_user_name,
-                        route_id=data.get('route_id'),
-                        lyft_booking=result.get('lyft_booking') is not None,
-                        filler_bookings_count=len(orchestrator.filler_bookings) if orchestrator else 0
-                    )
-                else:
-                    log_lyft_orchestrator(
-                        action='failed',
-                        original_user_key=original_user,
-                        original_user_name=original_user_name,
-                        route_id=data.get('route_id'),
-                        message=result.get('message'),
-                        filler_bookings_count=len(orchestrator.filler_bookings) if orchestrator else 0
-                    )
-                
-                # Finalize request log entry
-                if request_entry_id:
-                    try:
-                        developer_logs.update_request_entry(
-                            request_entry_id,
-                            log_text="\n".join(log_lines),
-                            status="success" if result.get("success") else "failed",
-                            success=result.get("success", False),
-                            finished_at=time.time(),
-                        )
-                    except Exception:
-                        pass
-
-                log_queue.put(('result', result))
-            except KeyboardInterrupt:
-                # Handle interruption - only cancel filler bookings
-                if orchestrator:
-                    try:
-                        orchestrator._cancel_all_filler_bookings()
-                        # Check if Lyft booking exists and preserve it
-                        if orchestrator.original_lyft_booking:
-                            result_container['result'] = {
-                                'success': True,
-                                'lyft_booking': {'prescheduled_recurring_series_rides': [{'id': orchestrator.original_lyft_booking['ride_id']}]},
-                                'message': 'Process was interrupted, but Lyft booking is preserved. Filler bookings cancelled.'
-                            }
-                            log_queue.put(('result', result_container['result']))
-                        else:
-                            log_queue.put(('error', 'Process was interrupted. All filler bookings have been cancelled.'))
-                    except:
-                        pass
-            except Exception as e:
-                # CRITICAL: Emergency cleanup - only cancel filler bookings, preserve Lyft
-                if orchestrator:
-                    try:
-                        orchestrator._cancel_all_filler_bookings()
-                        # Check if Lyft booking exists and preserve it
-                        if orchestrator.original_lyft_booking:
-                            result_container['result'] = {
-                                'success': True,
-                                'lyft_booking': {'prescheduled_recurring_series_rides': [{'id': orchestrator.original_lyft_booking['ride_id']}]},
-                                'message': f'Error occurred, but Lyft booking is preserved. Filler bookings cancelled: {str(e)}'
-                            }
-                            log_queue.put(('result', result_container['result']))
-                        else:
-                            # Log orchestrator error
-                            original_user_obj = get_user(original_user)
-                            original_user_name = original_user_obj.get('name') if original_user_obj else None
-                            log_lyft_orchestrator(
-                                action='error',
-                                original_user_key=original_user,
-                                original_user_name=original_user_name,
-                                error=str(e)
-                            )
-                            error_msg = f"Error: {str(e)}. All filler bookings have been cancelled."
-                            log_queue.put(('error', error_msg))
-                    except Exception as cleanup_error:
-                        print(f"CRITICAL: Emergency cleanup failed: {cleanup_error}")
-                        # Still try to preserve Lyft booking info if available
-                        if orchestrator and orchestrator.original_lyft_booking:
-                            result_container['result'] = {
-                                'success': True,
-                                'lyft_booking': {'prescheduled_recurring_series_rides': [{'id': orchestrator.original_lyft_booking['ride_id']}]},
-                                'message': f'Error occurred, but Lyft booking is preserved. Cleanup failed: {str(e)}'
-                            }
-                            log_queue.put(('result', result_container['result']))
-                else:
-                    # Log orchestrator error
-                    original_user_obj = get_user(original_user)
-                    original_user_name = original_user_obj.get('name') if original_user_obj else None
-                    log_lyft_orchestrator(
-                        action='error',
-                        original_user_key=original_user,
-                        original_user_name=original_user_name,
-                        error=str(e)
-                    )
-                    error_msg = f"Error: {str(e)}. All filler bookings have been cancelled."
-                    log_queue.put(('error', error_msg))
-            finally:
-                with _current_orchestrator_lock:
-                    if _current_orchestrator is orchestrator:
-                        _current_orchestrator = None
-                # Ensure request log entry is finalized even on error/interrupt
-                if request_entry_id:
-                    try:
-                        final_result = result_container.get('result') if isinstance(result_container, dict) else None
-                        final_success = final_result.get('success', False) if isinstance(final_result, dict) else False
-                        developer_logs.update_request_entry(
-                            request_entry_id,
-                            log_text="\n".join(log_lines),
-                            status="success" if final_success else "failed",
-                            success=final_success,
-                            finished_at=time.time(),
+
+            log_queue.put(('result', result))
+        except KeyboardInterrupt:
+            # Handle interruption - only cancel filler bookings
+            if orchestrator:
+                try:
+                    orchestrator._cancel_all_filler_bookings()
+                    # Check if Lyft booking exists and preserve it
+                    if orchestrator.original_lyft_booking:
+                        result_container['result'] = _lyft_preserved_result(orchestrator, 'Process was interrupted, but Lyft booking is preserved. Filler bookings cancelled.')
+                        log_queue.put(('result', result_container['result']))
+                    else:
+                        log_queue.put(('error', 'Process was interrupted. All filler bookings have been cancelled.'))
+                except Exception:
+                    pass
+        except Exception as e:
+            # CRITICAL: Emergency cleanup - only cancel filler bookings, preserve Lyft
+            if orchestrator:
+                try:
+                    orchestrator._cancel_all_filler_bookings()
+                    # Check if Lyft booking exists and preserve it
+                    if orchestrator.original_lyft_booking:
+                        result_container['result'] = _lyft_preserved_result(orchestrator, f'Error occurred, but Lyft booking is preserved. Filler bookings cancelled: {str(e)}')
+                        log_queue.put(('result', result_container['result']))
+                    else:
+                        # Log orchestrator error
+                        log_lyft_orchestrator(
+                            action='error',
+                            original_user_key=original_user,
+                            original_user_name=original_user_name,
+                            error=str(e)
                         )
-                    except Exception:
-                        pass
-                # If orchestrator finishes and original user has no active rides tracked here,
-                # leave their status as-is; otherwise set to idle.
+                        error_msg = f"Error: {str(e)}. All filler bookings have been cancelled."
+                        log_queue.put(('error', error_msg))
+                except Exception as cleanup_error:
+                    print(f"CRITICAL: Emergency cleanup failed: {cleanup_error}")
+                    # Still try to preserve Lyft booking info if available
+                    if orchestrator and orchestrator.original_lyft_booking:
+                        result_container['result'] = _lyft_preserved_result(orchestrator, f'Error occurred, but Lyft booking is preserved. Cleanup failed: {str(e)}')
+                        log_queue.put(('result', result_container['result']))
+            else:
+                # Log orchestrator error
+                log_lyft_orchestrator(
+                    action='error',
+                    original_user_key=original_user,
+                    original_user_name=original_user_name,
+                    error=str(e)
+                )
+                error_msg = f"Error: {str(e)}. All filler bookings have been cancelled."
+                log_queue.put(('error', error_msg))
+        finally:
+            with _current_orchestrator_lock:
+                if _current_orchestrator is orchestrator:
+                    _current_orchestrator = None
+            # Ensure request log entry is finalized even on error/interrupt
+            if request_entry_id:
                 try:
-                    snap = booking_state.snapshot()
-                    u = next((x for x in snap.get("users", []) if x.get("user_key") == original_user), None)
-                    if u and not u.get("active_rides"):
-                        booking_state.set_status(original_user, "idle")
+                    final_result = result_container.get('result') if isinstance(result_container, dict) else None
+                    final_success = final_result.get('success', False) if isinstance(final_result, dict) else False
+                    developer_logs.update_request_entry(
+                        request_entry_id,
+                        log_text="\n".join(log_lines),
+                        status="success" if final_success else "failed",
+                        success=final_success,
+                        finished_at=time.time(),
+                    )
                 except Exception:
                     pass
-        
-        # Start orchestrator in a thread
-        thread = threading.Thread(target=run_orchestrator, daemon=True)
-        thread.start()
-        
-        def generate():
-            """Generator function for Server-Sent Events."""
+            # If orchestrator finishes and original user has no active rides tracked here,
+            # set them back to idle; otherwise leave their status as-is.
             try:
-                while True:
-                    try:
-                        # Get message from queue with timeout
-                        item = log_queue.get(timeout=1)
-                        msg_type, content = item
-                        
-                        if msg_type == 'log':
-                            # Send log message
-                            yield f"data: {json.dumps({'type': 'log', 'message': content})}\n\n"
-                        elif msg_type == 'result':
-                            # Send final result
-                            yield f"data: {json.dumps({'type': 'result', 'data': content})}\n\n"
-                            break
-                        elif msg_type == 'error':
-                            # Send error
-                            yield f"data: {json.dumps({'type': 'error', 'message': content})}\n\n"
-                            break
-                    except queue.Empty:
-                        # Check if thread is still alive
-                        if not thread.is_alive():
-                            # Thread finished, check for result
-                            if result_container['result']:
-                                yield f"data: {json.dumps({'type': 'result', 'data': result_container['result']})}\n\n"
-                            else:
-                                # Thread died without result - emergency cleanup (only filler bookings)
-                                if orchestrator_instance['orchestrator']:
-                                    try:
-                                        orchestrator = orchestrator_instance['orchestrator']
-                                        orchestrator._cancel_all_filler_bookings()
-                                        # Check if Lyft booking exists and preserve it
-                                        if orchestrator.original_lyft_booking:
-                                            result_data = {
-                                                'success': True,
-                                                'lyft_booking': {'prescheduled_recurring_series_rides': [{'id': orchestrator.original_lyft_booking['ride_id']}]},
-                                                'message': 'Thread died unexpectedly, but Lyft booking is preserved. Filler bookings cancelled.'
-                                            }
-                                            yield f"data: {json.dumps({'type': 'result', 'data': result_data})}\n\n"
-                                        else:
-                                            yield f"data: {json.dumps({'type': 'error', 'message': 'Orchestrator thread died unexpectedly. All filler bookings have been cancelled.'})}\n\n"
-                                    except:
-                                        yield f"data: {json.dumps({'type': 'error', 'message': 'Orchestrator thread died unexpectedly. Attempted to cancel filler bookings.'})}\n\n"
-                                else:
-                                    yield f"data: {json.dumps({'type': 'error', 'message': 'Orchestrator thread died unexpectedly.'})}\n\n"
-                            break
-                        # Send keepalive
-                        yield ": keepalive\n\n"
-            except GeneratorExit:
-                # Client disconnected — do NOT stop the orchestrator.
-                # It keeps running and fans out to _current_run so the client
-                # can reconnect via GET /api/lyft/reconnect.
-                raise
-            except Exception as e:
-                # Any other error - emergency cleanup (only filler bookings, preserve Lyft)
-                if orchestrator_instance['orchestrator']:
-                    try:
-                        orchestrator = orchestrator_instance['orchestrator']
-                        orchestrator.request_stop(f"stream error: {str(e)}")
-                        orchestrator._cancel_all_filler_bookings()
-                        # Check if Lyft booking exists and try to send it
-                        if orchestrator.original_lyft_booking:
-                            result_data = {
-                                'success': True,
-                                'lyft_booking': {'prescheduled_recurring_series_rides': [{'id': orchestrator.original_lyft_booking['ride_id']}]},
-                                'message': f'Stream error, but Lyft booking is preserved. Filler bookings cancelled: {str(e)}'
-                            }
-                            yield f"data: {json.dumps({'type': 'result', 'data': result_data})}\n\n"
+                if booking_state.get_user_active_rides(original_user) == []:
+                    booking_state.set_status(original_user, "idle")
+            except Exception:
+                pass
+    
+    # Start orchestrator on the shared pool
+    try:
+        future = _ORCHESTRATOR_EXECUTOR.submit(run_orchestrator)
+    except Exception:
+        _orchestrator_slots.release()
+        raise
+    future.add_done_callback(lambda _f: _orchestrator_slots.release())
+    job['future'] = future
+    # If the run ends without putting a result/error, the stream must not sit
+    # out a full keepalive wait before noticing.
+    future.add_done_callback(lambda _f: log_queue.wake())
+    
+    def generate():
+        """Generator function for Server-Sent Events."""
+        yield _PADDING_FRAME
+        try:
+            while True:
+                try:
+                    # Block until the next message; a timeout only means "send a keepalive"
+                    item = log_queue.get(timeout=KEEPALIVE_INTERVAL)
+                    # Send it with any messages queued behind it; stop after the result/error
+                    chunk, finished = _drain_frames(item, log_queue)
+                    if chunk:
+                        yield chunk
+                    if finished:
+                        break
+                except queue.Empty:
+                    # Check if the run is still going
+                    if future.done():
+                        # Thread finished, check for result
+                        if result_container['result']:
+                            yield _result_frame(result_container['result'])
                         else:
-                            yield f"data: {json.dumps({'type': 'error', 'message': f'Stream error: {str(e)}. All filler bookings have been cancelled.'})}\n\n"
-                    except:
-                        yield f"data: {json.dumps({'type': 'error', 'message': f'Stream error: {str(e)}. Attempted to cancel filler bookings.'})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'error', 'message': f'Stream error: {str(e)}'})}\n\n"
-        
-        return Response(
-            stream_with_context(generate()),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'X-Accel-Buffering': 'no',
-                'Connection': 'keep-alive'
-            }
-        )
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+                            # Thread died without result - emergency cleanup (only filler bookings)
+                            yield _emergency_frame(orchestrator_instance['orchestrator'], 'Orchestrator thread died unexpectedly')
+                        break
+                    # Send keepalive
+                    yield _KEEPALIVE_FRAME
+        except GeneratorExit:
+            # Client disconnected — do NOT stop the orchestrator.
+            # It keeps running and fans out to _current_run so the client
+            # can reconnect via GET /api/lyft/reconnect.
+            raise
+        except Exception as e:
+            # Any other error - emergency cleanup (only filler bookings, preserve Lyft)
+            orchestrator = orchestrator_instance['orchestrator']
+            if orchestrator:
+                orchestrator.request_stop(f"stream error: {str(e)}")
+            yield _emergency_frame(orchestrator, f'Stream error: {str(e)}')
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={**_SSE_HEADERS, 'X-Job-Id': job_id}
+    )
+
+@app.route('/api/lyft/status/<job_id>', methods=['GET'])
+def lyft_job_status(job_id):
+    """
+    Poll the outcome of an orchestrator run started via /api/lyft/run.
+    
+    status is 'running' until the run finishes, then 'result' (outcome holds the
+    result dict) or 'error' (outcome holds the error message).
+    """
+    with _lyft_jobs_lock:
+        job = _lyft_jobs.get(job_id)
+    if job is None:
+        return _json_error(f"Job '{job_id}' not found", 404)
+    status = job['status']
+    if status == 'running' and job['future'] is not None and job['future'].done():
+        status = 'error'  # finished without ever emitting a result or error
+    return _ojson({
+        "job_id": job_id,
+        "user_key": job['user_key'],
+        "started_at": job['started_at'],
+        "done": status != 'running',
+        "status": status,
+        "outcome": job['outcome']
+    })
 
 @app.route('/api/lyft/cancel-booking', methods=['POST'])
 def cancel_individual_booking():
@@ -861,59 +1123,46 @@ def cancel_individual_booking():
         - user_id: str, user key of the person whose booking to cancel
         - ride_id: int, the ride ID to cancel
     """
+    data = _json_body()
+    
+    user_key, ride_id = _require(data, 'user_id', 'ride_id')
+    
+    if user_key not in USERS:
+        return _json_error(f"User '{user_key}' not found", 400)
+    
+    # Cancel the ride
+    auth_token, user_id, user_name = _user_fields(user_key)
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        user_key = data.get('user_id')
-        ride_id = data.get('ride_id')
-        
-        if not user_key:
-            return jsonify({"error": "Missing user_id"}), 400
-        if not ride_id:
-            return jsonify({"error": "Missing ride_id"}), 400
-        
-        if user_key not in USERS:
-            return jsonify({"error": f"User '{user_key}' not found"}), 400
-        
-        # Cancel the ride
-        auth_token = get_auth_token(user_key)
-        user_id = get_user_id(user_key)
+        booking_state.set_status(user_key, "cancelling", f"cancelling ride {ride_id}...")
+    except Exception:
+        pass
+    
+    response = cancel_ride(ride_id, auth_token=auth_token, user_id=user_id)
+    
+    if response:
+        # External server confirmed cancellation - update developer log so "Cancelled" shows
         try:
-            booking_state.set_status(user_key, "cancelling", f"cancelling ride {ride_id}...")
+            booking_state.remove_active_ride(user_key, int(ride_id))
         except Exception:
             pass
-        
-        response = cancel_ride(ride_id, auth_token=auth_token, user_id=user_id)
-        
-        if response:
-            # External server confirmed cancellation - update developer log so "Cancelled" shows
-            user_name = USERS[user_key]['name']
-            try:
-                booking_state.remove_active_ride(user_key, int(ride_id))
-            except Exception:
-                pass
-            try:
-                developer_logs.mark_cancelled(int(ride_id))
-            except Exception:
-                pass
-            return jsonify({
-                "success": True,
-                "message": f"Successfully cancelled {user_name}'s booking (ride ID: {ride_id})",
-                "cancellation_response": response
-            })
-        else:
-            try:
-                booking_state.set_status(user_key, "error", "cancellation failed")
-            except Exception:
-                pass
-            return jsonify({
-                "success": False,
-                "message": f"Failed to cancel booking (ride ID: {ride_id})"
-            }), 500
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        try:
+            developer_logs.mark_cancelled(int(ride_id))
+        except Exception:
+            pass
+        return _ojson({
+            "success": True,
+            "message": f"Successfully cancelled {user_name}'s booking (ride ID: {ride_id})",
+            "cancellation_response": response
+        })
+    else:
+        try:
+            booking_state.set_status(user_key, "error", "cancellation failed")
+        except Exception:
+            pass
+        return _ojson({
+            "success": False,
+            "message": f"Failed to cancel booking (ride ID: {ride_id})"
+        }, 500)
 
 @app.route('/api/lyft/stop', methods=['POST'])
 def stop_orchestrator():
@@ -921,9 +1170,18 @@ def stop_orchestrator():
     with _current_orchestrator_lock:
         orchestrator = _current_orchestrator
     if orchestrator is None:
-        return jsonify({"success": True, "message": "No orchestrator running"})
+        return _ojson({"success": True, "message": "No orchestrator running"})
     orchestrator.request_stop("user requested stop")
-    return jsonify({"success": True, "message": "Stop signal sent to orchestrator"})
+    return _ojson({"success": True, "message": "Stop signal sent to orchestrator"})
+
+# /api/lyft/check only reports counts, so a recent answer for the same
+# route and user is reused instead of searching upstream again. Proposals
+# themselves are never cached (they expire and are needed fresh to book).
+_LYFT_CHECK_TTL = 15  # seconds
+_LYFT_CHECK_MAX_ENTRIES = 256
+_lyft_check_cache = {}  # (locations, user_id) -> (expires_at, payload)
+_lyft_check_lock = threading.Lock()
+
 
 @app.route('/api/lyft/check', methods=['POST'])
 def check_lyft_availability():
@@ -935,57 +1193,47 @@ def check_lyft_availability():
         - route_id: str, route ID (optional)
         - origin/destination: custom locations (optional)
     """
-    try:
-        data = request.get_json() or {}
-        
-        user_key = data.get('user_id')
-        auth_token = get_auth_token(user_key) if user_key else None
-        user_id = get_user_id(user_key) if user_key else None
-        
-        # Get origin/destination
-        if 'route_id' in data:
-            try:
-                origin, destination = get_location_pair(data['route_id'])
-            except ValueError:
-                return jsonify({"error": f"Route '{data['route_id']}' not found"}), 400
-        else:
-            origin = data.get('origin', config.default_origin)
-            destination = data.get('destination', config.default_destination)
-        
-        # Search for rides
-        response = search_ride(origin, destination, auth_token=auth_token, user_id=user_id)
-        
-        if not response or 'proposals' not in response:
-            return jsonify({
-                "has_lyft": False,
-                "ridesmart_count": 0,
-                "proposals": []
-            })
-        
-        proposals = response.get('proposals', [])
-        
-        # Categorize proposals
-        lyft_count = 0
-        ridesmart_count = 0
-        
-        for p in proposals:
-            # Simple approach: scan the entire proposal for "lyft" anywhere
-            proposal_str = json.dumps(p).lower()
-            is_lyft = 'lyft' in proposal_str
-            
-            if is_lyft:
-                lyft_count += 1
-            else:
-                ridesmart_count += 1
-        
-        return jsonify({
-            "has_lyft": lyft_count > 0,
-            "lyft_count": lyft_count,
-            "ridesmart_count": ridesmart_count,
-            "total_proposals": len(proposals)
+    data = request.get_json() or {}
+    
+    # Get origin/destination and credentials
+    origin, destination, _, auth_token, user_id, _ = _resolve_request(data)
+    
+    cache_key = (orjson.dumps([origin, destination], option=orjson.OPT_SORT_KEYS), user_id)
+    now = time.monotonic()
+    with _lyft_check_lock:
+        cached = _lyft_check_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return _ojson(cached[1])
+    
+    # Search for rides
+    response = search_ride(origin, destination, auth_token=auth_token, user_id=user_id)
+    
+    if not response or 'proposals' not in response:
+        return _ojson({
+            "has_lyft": False,
+            "ridesmart_count": 0,
+            "proposals": []
         })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    
+    proposals = response.get('proposals', [])
+    
+    # Categorize proposals
+    lyft_proposals, ridesmart_proposals = classify_proposals(proposals)
+    lyft_count = len(lyft_proposals)
+    ridesmart_count = len(ridesmart_proposals)
+    
+    payload = {
+        "has_lyft": lyft_count > 0,
+        "lyft_count": lyft_count,
+        "ridesmart_count": ridesmart_count,
+        "total_proposals": len(proposals)
+    }
+    with _lyft_check_lock:
+        _lyft_check_cache.pop(cache_key, None)
+        _lyft_check_cache[cache_key] = (now + _LYFT_CHECK_TTL, payload)
+        while len(_lyft_check_cache) > _LYFT_CHECK_MAX_ENTRIES:
+            del _lyft_check_cache[next(iter(_lyft_check_cache))]
+    return _ojson(payload)
 
 @app.route('/api/lyft/reconnect', methods=['GET'])
 def reconnect_lyft_stream():
@@ -1002,7 +1250,7 @@ def reconnect_lyft_stream():
 
     with _current_run_lock:
         if not _current_run['logs'] and not _current_run['done']:
-            return jsonify({'error': 'No active orchestrator run'}), 404
+            return _json_error('No active orchestrator run', 404)
 
         missed_logs = _current_run['logs'][offset:]
         already_done = _current_run['done']
@@ -1010,62 +1258,63 @@ def reconnect_lyft_stream():
 
         subscriber_q = None
         if not already_done:
-            subscriber_q = queue.Queue(maxsize=500)
-            _current_run['subscribers'].append(subscriber_q)
+            subscriber_q = _LogChannel(maxsize=500)
+            _current_run['subscribers'].add(subscriber_q)
 
     def generate():
-        # Replay logs the client missed while disconnected
-        for log_line in missed_logs:
-            yield f"data: {json.dumps({'type': 'log', 'message': log_line})}\n\n"
+        # Replay logs the client missed while disconnected, in the first write
+        yield _PADDING_FRAME + b"".join(_log_frame(log_line) for log_line in missed_logs)
 
         if already_done:
             if final_result:
-                yield f"data: {json.dumps({'type': 'result', 'data': final_result})}\n\n"
+                yield _result_frame(final_result)
             else:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Run finished with no result'})}\n\n"
+                yield _NO_RESULT_FRAME
             return
 
         # Stream live events until orchestrator finishes
         try:
             while True:
                 try:
-                    item = subscriber_q.get(timeout=15)
-                    msg_type, content = item
-                    if msg_type == 'log':
-                        yield f"data: {json.dumps({'type': 'log', 'message': content})}\n\n"
-                    elif msg_type == 'result':
-                        yield f"data: {json.dumps({'type': 'result', 'data': content})}\n\n"
-                        break
-                    elif msg_type == 'error':
-                        yield f"data: {json.dumps({'type': 'error', 'message': content})}\n\n"
+                    item = subscriber_q.get(timeout=KEEPALIVE_INTERVAL)
+                    chunk, finished = _drain_frames(item, subscriber_q)
+                    if chunk:
+                        yield chunk
+                    if finished:
                         break
                 except queue.Empty:
                     # Fallback: check if done (guards against missed fanout)
                     with _current_run_lock:
                         if _current_run['done']:
                             if _current_run['result']:
-                                yield f"data: {json.dumps({'type': 'result', 'data': _current_run['result']})}\n\n"
+                                yield _result_frame(_current_run['result'])
                             break
-                    yield ": keepalive\n\n"
+                    yield _KEEPALIVE_FRAME
         except GeneratorExit:
             with _current_run_lock:
-                try:
-                    _current_run['subscribers'].remove(subscriber_q)
-                except ValueError:
-                    pass
+                _current_run['subscribers'].discard(subscriber_q)
             raise
 
     return Response(
-        stream_with_context(generate()),
+        generate(),
         mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no',
-            'Connection': 'keep-alive',
-        }
+        headers=_SSE_HEADERS
     )
 
 
+# ── Warmup ───────────────────────────────────────────────────────────────────
+def _warm_route_cache():
+    """
+    Fill the get_location_pair cache so the first request for each route is a
+    cache hit (static payloads above are already encoded at import).
+    """
+    for route in ROUTE_SUMMARIES:
+        get_location_pair(route["id"])
+
+
+_warm_route_cache()
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
 
@@ -0,0 +1,13 @@
+"""
+Gunicorn settings shared by the Dockerfile and App Runner. gunicorn loads
+./gunicorn.conf.py automatically; flags on the command line override these.
+
+gevent workers run SSE streams and slow upstream RideSmart calls as greenlets,
+so one worker holds up to worker_connections of them at once (see wsgi.py).
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+worker_class = "gevent"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_connections = 1000
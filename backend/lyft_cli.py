@@ -14,7 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.lyft_orchestrator import LyftOrchestrator
 from src.users import USERS, list_users
-from src.destination_config import LOCATIONS, get_location_pair, list_available_locations
+from src.destination_config import get_location_pair, list_available_locations
 
 
 def print_header():
@@ -55,9 +55,8 @@ def select_route():
     
     print("\nAvailable routes:")
     for i, loc in enumerate(locations, 1):
-        origin = LOCATIONS[loc]['origin'].get('geocoded_addr', loc)
-        dest = LOCATIONS[loc]['destination'].get('geocoded_addr', loc)
-        print(f"  {i}. {origin} → {dest}")
+        origin, destination = get_location_pair(loc)
+        print(f"  {i}. {origin.get('geocoded_addr', loc)} → {destination.get('geocoded_addr', loc)}")
     
     while True:
         try:
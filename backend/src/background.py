@@ -0,0 +1,43 @@
+"""
+Background threads that start on first use.
+
+gunicorn imports the app and then forks workers, and threads do not survive a
+fork, so a thread started at import time would not exist in the process that
+serves requests. Each background worker (log writer, status publisher, access
+flusher, SSE keepalive ticker) is therefore a LazyThread: the first call that
+needs it starts it, and a worker that died (or an object inherited across a
+fork, which reports is_alive() False) is started again the same way.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Optional
+
+
+class LazyThread:
+    """A daemon thread running target, started by the first ensure_started() call."""
+
+    def __init__(self, target: Callable[[], None], name: str) -> None:
+        self._target = target
+        self.name = name
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        """Start the thread unless it is already running (cheap once it is)."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._target, name=self.name, daemon=True)
+                self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the thread to finish; True if it is not running afterwards."""
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
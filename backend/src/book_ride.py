@@ -3,8 +3,29 @@ import json
 import time
 try:
     from src import config
+    from src.http_client import http_session
+    from src import ridesmart_payload
 except ImportError:
     import config
+    from http_client import http_session
+    import ridesmart_payload
+
+
+def booked_ride_id(response):
+    """
+    Confirmed ride id from a successful book_ride() response, as an int.
+
+    Returns None when the response is not a JSON object or carries no
+    prescheduled_recurring_series_rides entry with an id.
+    """
+    if not isinstance(response, dict):
+        return None
+    rides = response.get('prescheduled_recurring_series_rides')
+    if not rides:
+        return None
+    ride_id = rides[0].get('id')
+    return int(ride_id) if ride_id is not None else None
+
 
 def book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, auth_token=None, user_id=None):
     """
@@ -32,32 +53,20 @@ def book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, auth_tok
     
     ride_id = prescheduled_ride_id
     
-    # JSON payload
+    # One timestamp for client_ts and end_date_timestamp
+    now_ts = config.get_current_timestamp()
+
+    # JSON payload (constant parts are shared, see ridesmart_payload)
     payload = {
         "client_details": {
-            "client_spec": {
-                "client_version": {
-                    "major_version": "4.22.9",
-                    "minor_version": "8"
-                },
-                "client_os_version": "26.3",
-                "client_os": 0,
-                "client_type": 0,
-                "app_name": "RideSmart",
-                "device_name": "iPhone",
-                "device_model": "iPhone16,1",
-                "device_id": "2C33CDBD-5C95-4F2B-9393-C96A9F142A30",
-                "app_id": "UniversityOfChicagoRider"
-            },
+            "client_spec": ridesmart_payload.CLIENT_SPEC,
             "client_state": {
                 "battery_level": config.battery_level,
                 "charging": config.charging,
-                "client_ts": config.get_current_timestamp()
+                "client_ts": now_ts
             }
         },
-        "sub_services": [
-            "U_Chicago_Safe_Ride"
-        ],
+        "sub_services": ridesmart_payload.SUB_SERVICES,
         "rider_service_flag": 0,
         "whos_asking": {
             "id": user_id,
@@ -70,43 +79,16 @@ def book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, auth_tok
             "destination": destination,
             "recurring_series_type": "OT",
             "n_passengers": config.n_passengers,
-            "plus_one_types": [
-                {
-                    "id": 6261,
-                    "maximum_passengers_count": 1,
-                    "minimum_passengers_count": 1,
-                    "current_passengers_count": 1,
-                    "title": "Me",
-                    "is_item": False
-                },
-                {
-                    "id": 6263,
-                    "maximum_passengers_count": 1,
-                    "minimum_passengers_count": 0,
-                    "title": "Extra Rider",
-                    "current_passengers_count": 1 if config.include_extra_rider else 0,
-                    "is_item": False
-                }
-            ]
-        },
-        "prescheduled_recurring_series_ride_details": {
-            "display_time": []
+            "plus_one_types": ridesmart_payload.plus_one_types()
         },
+        "prescheduled_recurring_series_ride_details": ridesmart_payload.RIDE_DETAILS,
         "id": ride_id,
         "prescheduled_ride_id": prescheduled_ride_id,
         "prescheduled_recurring_series_id": 0,
         "mp_session_id": 8880627820818019707,
         "proposal_uuid": proposal_uuid,
-        "end_date_timestamp": config.get_current_timestamp(),
-        "supported_features": [
-            "INTERMODAL_SECOND_LEG",
-            "RECURRING_INTERMODAL"
-        ]
-    }
-    
-    # Headers
-    headers = {
-        "Content-Type": "application/json"
+        "end_date_timestamp": now_ts,
+        "supported_features": ridesmart_payload.BOOK_SUPPORTED_FEATURES
     }
     
     try:
@@ -116,7 +98,7 @@ def book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, auth_tok
         last_exc = None
         for attempt in range(1, max_attempts + 1):
             try:
-                response = requests.post(url, json=payload, headers=headers, timeout=(5, 30))
+                response = http_session.post(url, json=payload, headers=ridesmart_payload.JSON_HEADERS, timeout=(5, 30))
                 break
             except requests.exceptions.RequestException as e:
                 last_exc = e
@@ -172,7 +154,7 @@ def book_ride(prescheduled_ride_id, proposal_uuid, origin, destination, auth_tok
             if e.response:
                 error_info['response'] = e.response.json()
                 error_info['error'] = e.response.json().get('message') or e.response.json().get('error') or str(e)
-        except:
+        except Exception:
             if e.response:
                 error_info['response'] = e.response.text
         print(f"HTTP Error making request: {error_info}")
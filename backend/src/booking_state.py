@@ -4,7 +4,7 @@ Server-owned booking status store.
 Goal:
 - Keep track of active bookings per user (RideSmart/Lyft) and a simple status.
 - Provide a single "source of truth" that can be shared across all web clients.
-- Support Server-Sent Events (SSE) by broadcasting snapshot updates to subscribers.
+- Support Server-Sent Events (SSE) by broadcasting snapshot updates on a shared channel.
 
 Notes:
 - This is process-memory state. For Render robustness, run a single worker or use
@@ -13,13 +13,16 @@ Notes:
 
 from __future__ import annotations
 
-import json
-import queue
 import threading
 import time
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
+
+from src.background import LazyThread
+from src.broadcast import Broadcast
+
 
 def _now_ts() -> float:
     return time.time()
@@ -32,6 +35,15 @@ class ActiveRide:
     source: str = "unknown"  # "orchestrator" | "individual" | "unknown"
     created_at: float = field(default_factory=_now_ts)
 
+    def to_dict(self) -> Dict[str, Any]:
+        # Same dict as dataclasses.asdict, without its per-field reflection and deepcopy.
+        return {
+            "ride_id": self.ride_id,
+            "ride_type": self.ride_type,
+            "source": self.source,
+            "created_at": self.created_at,
+        }
+
 
 @dataclass
 class UserBookingState:
@@ -39,15 +51,25 @@ class UserBookingState:
     user_name: str
     status: str = "idle"  # idle | searching | booking | booked | cancelling | error | orchestrating
     message: str = ""
-    active_rides: List[ActiveRide] = field(default_factory=list)
+    # Keyed by ride_id; dicts keep insertion order, so snapshots list rides in booking order.
+    active_rides: Dict[int, ActiveRide] = field(default_factory=dict)
     updated_at: float = field(default_factory=_now_ts)
 
 
 class BookingStateStore:
+    # Mutations within this many seconds of each other go out as one snapshot.
+    publish_window = 0.05
+
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._users: Dict[str, UserBookingState] = {}
-        self._subscribers: List[queue.Queue[str]] = []
+        # Every publish is a full encoded snapshot; SSE streams wait on this channel.
+        self.channel = Broadcast()
+        self._dirty = threading.Event()
+        self._publisher = LazyThread(self._publish_loop, "booking-state-publisher")
+        # Encoded snapshot message, reused until the next mutation; shared by the
+        # publisher and by every new stream's first frame.
+        self._encoded: Optional[bytes] = None
 
     # --- initialization ---
     def init_users(self, users: Dict[str, Dict[str, Any]]) -> None:
@@ -82,16 +104,14 @@ class BookingStateStore:
     ) -> None:
         with self._lock:
             st = self._get_or_create_locked(user_key)
-            for r in st.active_rides:
-                if r.ride_id == ride_id:
-                    # Update metadata, keep original created_at
-                    r.ride_type = ride_type or r.ride_type
-                    r.source = source or r.source
-                    st.updated_at = _now_ts()
-                    st.status = "booked"
-                    self._publish_locked()
-                    return
-            st.active_rides.append(ActiveRide(ride_id=int(ride_id), ride_type=ride_type, source=source))
+            ride_id = int(ride_id)
+            r = st.active_rides.get(ride_id)
+            if r is not None:
+                # Update metadata, keep original created_at
+                r.ride_type = ride_type or r.ride_type
+                r.source = source or r.source
+            else:
+                st.active_rides[ride_id] = ActiveRide(ride_id=ride_id, ride_type=ride_type, source=source)
             st.status = "booked"
             st.updated_at = _now_ts()
             self._publish_locked()
@@ -99,7 +119,7 @@ class BookingStateStore:
     def remove_active_ride(self, user_key: str, ride_id: int) -> None:
         with self._lock:
             st = self._get_or_create_locked(user_key)
-            st.active_rides = [r for r in st.active_rides if r.ride_id != int(ride_id)]
+            st.active_rides.pop(int(ride_id), None)
             st.updated_at = _now_ts()
             if not st.active_rides and st.status in {"booked", "cancelling"}:
                 st.status = "idle"
@@ -109,12 +129,19 @@ class BookingStateStore:
     def clear_all_active_rides(self, user_key: str) -> None:
         with self._lock:
             st = self._get_or_create_locked(user_key)
-            st.active_rides = []
+            st.active_rides.clear()
             st.status = "idle"
             st.message = ""
             st.updated_at = _now_ts()
             self._publish_locked()
 
+    # --- reads ---
+    def get_user_active_rides(self, user_key: str) -> Optional[List[ActiveRide]]:
+        """Copy of one user's active rides, or None if the user is unknown."""
+        with self._lock:
+            st = self._users.get(user_key)
+            return list(st.active_rides.values()) if st is not None else None
+
     # --- snapshots ---
     def snapshot(self) -> Dict[str, Any]:
         with self._lock:
@@ -131,37 +158,39 @@ class BookingStateStore:
                     "status": st.status,
                     "message": st.message,
                     "updated_at": st.updated_at,
-                    "active_rides": [asdict(r) for r in st.active_rides],
+                    "active_rides": [r.to_dict() for r in st.active_rides.values()],
                 }
             )
         return {"ts": _now_ts(), "users": users}
 
     # --- pub/sub for SSE ---
-    def subscribe(self) -> queue.Queue[str]:
-        q: queue.Queue[str] = queue.Queue()
-        with self._lock:
-            self._subscribers.append(q)
-            # Immediately send a snapshot
-            q.put(self._encode_snapshot_locked())
-        return q
-
-    def unsubscribe(self, q: queue.Queue[str]) -> None:
+    def encode_snapshot(self) -> bytes:
+        """Current state as an encoded SSE snapshot message (sent first on every stream)."""
         with self._lock:
-            self._subscribers = [s for s in self._subscribers if s is not q]
+            return self._encode_snapshot_locked()
 
     def _publish_locked(self) -> None:
-        payload = self._encode_snapshot_locked()
-        dead: List[queue.Queue[str]] = []
-        for q in self._subscribers:
+        # Every mutation ends here, so this is also where the encoded snapshot goes stale.
+        self._encoded = None
+        # Coalesce bursts (e.g. several set_status calls per request): mark the state
+        # dirty and let the publisher thread encode one snapshot per window.
+        self._dirty.set()
+        self._publisher.ensure_started()
+
+    def _publish_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            time.sleep(self.publish_window)
+            self._dirty.clear()
             try:
-                q.put_nowait(payload)
-            except Exception:
-                dead.append(q)
-        if dead:
-            self._subscribers = [q for q in self._subscribers if q not in dead]
-
-    def _encode_snapshot_locked(self) -> str:
-        return json.dumps({"type": "snapshot", "data": self._snapshot_locked()})
+                self.channel.publish(self.encode_snapshot())
+            except Exception as e:
+                print(f"Booking state: publish failed: {e}")
+
+    def _encode_snapshot_locked(self) -> bytes:
+        if self._encoded is None:
+            self._encoded = orjson.dumps({"type": "snapshot", "data": self._snapshot_locked()})
+        return self._encoded
 
     def _get_or_create_locked(self, user_key: str) -> UserBookingState:
         if user_key not in self._users:
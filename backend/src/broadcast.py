@@ -0,0 +1,109 @@
+"""
+Versioned broadcast channel for SSE streams.
+
+Publishers append an event to a small ring under one Condition and wake every
+waiting stream; each stream keeps its own cursor (the last sequence number it
+sent) instead of owning a queue. Publishing costs the same no matter how many
+clients are connected, and nothing has to be unregistered when a client goes
+away.
+
+Each event is stored as its complete SSE frame (id + data lines, UTF-8 bytes),
+built once at publish time, so streams write the same bytes object to every
+client without formatting or encoding anything per connection.
+
+Event ids are "<epoch>:<seq>" where epoch is random per process, so a
+Last-Event-ID from before a restart never matches the current channel.
+
+Idle streams are kept alive by one ticker thread per process that wakes every
+channel's waiters each KEEPALIVE_INTERVAL seconds, rather than by every stream
+timing out on its own; a tick does not advance the sequence number.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Tuple, Union
+
+from src.background import LazyThread
+
+# Seconds between keepalive ticks; below common proxy idle timeouts (nginx: 60s).
+KEEPALIVE_INTERVAL = 25
+
+_channels: "weakref.WeakSet[Broadcast]" = weakref.WeakSet()
+
+
+def _tick_forever() -> None:
+    while True:
+        time.sleep(KEEPALIVE_INTERVAL)
+        for channel in list(_channels):
+            channel.keepalive()
+
+
+_ticker = LazyThread(_tick_forever, "sse-keepalive")
+
+
+class Broadcast:
+    def __init__(self, maxlen: int = 64) -> None:
+        self._cond = threading.Condition()
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=maxlen)
+        self._seq = 0
+        self._ticks = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        _channels.add(self)
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the most recent event (0 before the first publish)."""
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}:{seq}"
+
+    def frame(self, seq: int, payload: Union[str, bytes]) -> bytes:
+        """SSE frame for a JSON payload (str, or UTF-8 bytes as from orjson) at sequence number seq."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        return b"id: %s:%d\ndata: %s\n\n" % (self.epoch.encode(), seq, payload)
+
+    def publish(self, payload: Union[str, bytes]) -> int:
+        """Store a JSON payload as a ready-made frame, wake all waiters, return its seq."""
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, self.frame(self._seq, payload)))
+            self._cond.notify_all()
+            return self._seq
+
+    def keepalive(self) -> None:
+        """Wake streams waiting with keepalive=True so they can write a keepalive comment."""
+        with self._cond:
+            self._ticks += 1
+            self._cond.notify_all()
+
+    def wait(
+        self, after: int, timeout: Optional[float] = None, keepalive: bool = False
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Block until there are events newer than `after` (or timeout) and return
+        their (seq, frame) pairs oldest first. Events that already fell out of
+        the ring are skipped.
+
+        With keepalive=True, the next keepalive tick also ends the wait (with an
+        empty list), so SSE streams can use a long timeout as a safety net only.
+        """
+        if keepalive:
+            _ticker.ensure_started()
+        with self._cond:
+            ticks = self._ticks
+            if keepalive:
+                self._cond.wait_for(lambda: self._seq > after or self._ticks != ticks, timeout)
+            else:
+                self._cond.wait_for(lambda: self._seq > after, timeout)
+            if self._seq <= after or not self._events:
+                return []
+            start = max(after + 1 - self._events[0][0], 0)
+            return list(islice(self._events, start, None))
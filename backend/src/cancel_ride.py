@@ -3,8 +3,10 @@ import json
 import time
 try:
     from src import config
+    from src.http_client import http_session
 except ImportError:
     import config
+    from http_client import http_session
 
 def cancel_ride(ride_id, auth_token=None, user_id=None):
     """
@@ -78,7 +80,7 @@ def cancel_ride(ride_id, auth_token=None, user_id=None):
         last_error = None
         for attempt in range(1, max_attempts + 1):
             try:
-                response = requests.post(url, json=payload, headers=headers, timeout=(5, 20))
+                response = http_session.post(url, json=payload, headers=headers, timeout=(5, 20))
                 # Check if request was successful
                 response.raise_for_status()
                 break
@@ -7,6 +7,17 @@ To use a different location pair:
 2. Or add a new location pair to LOCATIONS and set ACTIVE_LOCATION to its name
 """
 
+from functools import lru_cache
+
+
+class UnknownLocationError(ValueError):
+    """Raised when a location pair name is not in LOCATIONS."""
+
+    def __init__(self, location_name):
+        self.location_name = location_name
+        super().__init__(f"Location '{location_name}' not found. "
+                         f"Available locations: {list(LOCATIONS.keys())}")
+
 # Set this to the name of the location pair you want to use as default
 ACTIVE_LOCATION = "i_house_to_cathey"
 
@@ -71,23 +82,23 @@ LOCATIONS = {
 }
 
 def get_active_origin():
-    """Get the origin for the currently active location pair."""
-    if ACTIVE_LOCATION not in LOCATIONS:
-        raise ValueError(f"Active location '{ACTIVE_LOCATION}' not found in LOCATIONS. "
-                        f"Available locations: {list(LOCATIONS.keys())}")
-    return LOCATIONS[ACTIVE_LOCATION]["origin"]
+    """Get the origin for the currently active location pair (memoized via get_location_pair)."""
+    return get_location_pair(ACTIVE_LOCATION)[0]
 
 def get_active_destination():
-    """Get the destination for the currently active location pair."""
-    if ACTIVE_LOCATION not in LOCATIONS:
-        raise ValueError(f"Active location '{ACTIVE_LOCATION}' not found in LOCATIONS. "
-                        f"Available locations: {list(LOCATIONS.keys())}")
-    return LOCATIONS[ACTIVE_LOCATION]["destination"]
+    """Get the destination for the currently active location pair (memoized via get_location_pair)."""
+    return get_location_pair(ACTIVE_LOCATION)[1]
 
+@lru_cache(maxsize=None)
 def get_location_pair(location_name=None):
     """
     Get origin and destination for a specific location pair.
     
+    LOCATIONS is static, so results are memoized per location name. The cached
+    dicts are the same objects stored in LOCATIONS (as before); callers must not
+    mutate them. Unknown names raise UnknownLocationError (a ValueError) and are
+    not cached.
+    
     Args:
         location_name: str, name of the location pair. If None, uses ACTIVE_LOCATION.
     
@@ -98,8 +109,7 @@ def get_location_pair(location_name=None):
         location_name = ACTIVE_LOCATION
     
     if location_name not in LOCATIONS:
-        raise ValueError(f"Location '{location_name}' not found. "
-                        f"Available locations: {list(LOCATIONS.keys())}")
+        raise UnknownLocationError(location_name)
     
     loc = LOCATIONS[location_name]
     return loc["origin"], loc["destination"]
@@ -108,3 +118,40 @@ def list_available_locations():
     """List all available location pair names."""
     return list(LOCATIONS.keys())
 
+
+def _title(slug):
+    return slug.replace("_", " ").title()
+
+
+def _build_route_summaries():
+    """Display metadata for every location pair (names derived from the key when unset)."""
+    routes = []
+    for route_name, route_data in LOCATIONS.items():
+        origin = route_data.get("origin", {})
+        destination = route_data.get("destination", {})
+        slugs = route_name.split("_to_")
+        routes.append({
+            "id": route_name,
+            "name": _title(route_name),
+            "origin": {
+                "name": origin.get("geocoded_addr") or origin.get("full_geocoded_addr") or _title(slugs[0]),
+                "data": origin
+            },
+            "destination": {
+                "name": destination.get("geocoded_addr") or destination.get("full_geocoded_addr") or _title(slugs[-1]),
+                "data": destination
+            }
+        })
+    return routes
+
+
+# LOCATIONS is static, so the route listing is built once at import.
+ROUTE_SUMMARIES = _build_route_summaries()
+
+
+def reload_route_summaries():
+    """Rebuild ROUTE_SUMMARIES and drop memoized pairs after LOCATIONS changes (e.g. in tests)."""
+    global ROUTE_SUMMARIES
+    get_location_pair.cache_clear()
+    ROUTE_SUMMARIES = _build_route_summaries()
+    return ROUTE_SUMMARIES
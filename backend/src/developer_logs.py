@@ -5,8 +5,7 @@ Persisted to SQLite (backend/data/developer_logs.db), broadcast in real time via
 
 from __future__ import annotations
 
-import json
-import queue
+import atexit
 import re
 import threading
 import time
@@ -16,17 +15,22 @@ from typing import Any, Dict, List, Optional
 
 import os
 
+import orjson
+
 from src.developer_logs_db import (
     init_schema,
     insert_ride,
     update_ride_cancelled,
     insert_access,
+    insert_access_many,
     insert_request,
     update_request,
     load_ride_entries,
     load_access_entries,
     load_request_entries,
 )
+from src.background import LazyThread
+from src.broadcast import Broadcast
 
 
 def _use_postgres() -> bool:
@@ -93,6 +97,11 @@ class RequestLogEntry:
 class DeveloperLogStore:
     """Developer ride log and user access log: persisted to SQLite, broadcast via SSE."""
 
+    # Access entries are written in batches: every this many seconds, or sooner
+    # once this many are waiting.
+    access_flush_interval = 0.5
+    access_flush_batch = 100
+
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._ride_entries: List[RideLogEntry] = []
@@ -101,7 +110,14 @@ class DeveloperLogStore:
         self._ride_id_counter = 0
         self._access_id_counter = 0
         self._request_id_counter = 0
-        self._subscribers: List[queue.Queue[str]] = []
+        # Every broadcast is a full encoded snapshot; SSE streams wait on this channel.
+        self.channel = Broadcast()
+        self._access_buf: List[Dict[str, Any]] = []
+        # Access entries not yet in the DB (buffered or being flushed), by id; merged
+        # into Postgres snapshots so live clients see them before they are persisted.
+        self._access_unsaved: Dict[int, Dict[str, Any]] = {}
+        self._access_full = threading.Event()
+        self._access_flusher = LazyThread(self._access_flush_loop, "developer-access-flusher")
         self._load_from_db()
 
     def _load_from_db(self) -> None:
@@ -260,6 +276,10 @@ class DeveloperLogStore:
 
     # --- User access log ---
     def append_access(self, ip: str, user_agent: str, path: str = "/") -> UserAccessEntry:
+        """
+        Record an access. The entry is visible in memory at once; the DB insert is
+        buffered and done in bulk by the flusher thread (one commit per batch).
+        """
         with self._lock:
             entry = UserAccessEntry(
                 id=self._next_access_id(),
@@ -267,15 +287,43 @@ class DeveloperLogStore:
                 user_agent=user_agent or "",
                 path=path,
             )
-            try:
-                insert_access(asdict(entry))
-            except Exception as e:
-                print(f"Developer logs: failed to persist access: {e}")
-                traceback.print_exc()
             self._access_entries.append(entry)
+            entry_dict = asdict(entry)
+            self._access_buf.append(entry_dict)
+            self._access_unsaved[entry.id] = entry_dict
+            if len(self._access_buf) >= self.access_flush_batch:
+                self._access_full.set()
+            self._access_flusher.ensure_started()
             self._broadcast_locked()
             return entry
 
+    def flush_access(self) -> None:
+        """Write all buffered access entries to the DB."""
+        with self._lock:
+            batch, self._access_buf = self._access_buf, []
+        if not batch:
+            return
+        try:
+            insert_access_many(batch)
+        except Exception as e:
+            # Fall back to one insert per entry so one bad row (or a batch-level
+            # error) does not lose the rest; entries that still fail are dropped.
+            print(f"Developer logs: batch insert of {len(batch)} access entries failed, retrying one by one: {e}")
+            for entry in batch:
+                try:
+                    insert_access(entry)
+                except Exception as ex:
+                    print(f"Developer logs: failed to persist access entry {entry['id']}: {ex}")
+        with self._lock:
+            for entry in batch:
+                self._access_unsaved.pop(entry["id"], None)
+
+    def _access_flush_loop(self) -> None:
+        while True:
+            self._access_full.wait(self.access_flush_interval)
+            self._access_full.clear()
+            self.flush_access()
+
     def get_access_log(self) -> List[Dict[str, Any]]:
         with self._lock:
             return [asdict(e) for e in reversed(self._access_entries)]
@@ -361,6 +409,8 @@ class DeveloperLogStore:
             try:
                 ride_dicts = load_ride_entries()
                 access_dicts = load_access_entries()
+                with self._lock:
+                    access_dicts = self._with_unsaved_access_locked(access_dicts)
                 request_dicts = load_request_entries()
                 return {
                     "ts": _now_ts(),
@@ -378,22 +428,13 @@ class DeveloperLogStore:
                 "request_log": [asdict(e) for e in reversed(self._request_entries)],
             }
 
-    # --- SSE subscribe / broadcast ---
-    def subscribe(self) -> queue.Queue[str]:
-        q: queue.Queue[str] = queue.Queue()
-        with self._lock:
-            self._subscribers.append(q)
-            # When using Postgres, initial snapshot from DB so new client sees shared state
-            data = self._snapshot_from_db_if_postgres() or self._snapshot_locked()
-            q.put(json.dumps({"type": "snapshot", "data": data}))
-        return q
-
-    def unsubscribe(self, q: queue.Queue[str]) -> None:
-        with self._lock:
-            self._subscribers = [s for s in self._subscribers if s is not q]
+    # --- SSE broadcast ---
+    def encode_snapshot(self) -> bytes:
+        """Current logs as an encoded SSE snapshot message (sent first on every stream).
 
-    def _encode_snapshot(self) -> str:
-        return json.dumps({"type": "snapshot", "data": self.snapshot()})
+        When using Postgres this reads from the DB so a new client sees shared state.
+        """
+        return orjson.dumps({"type": "snapshot", "data": self.snapshot()})
 
     def _snapshot_from_db_if_postgres(self) -> Optional[Dict[str, Any]]:
         """When using Postgres, return snapshot from DB; else None."""
@@ -401,7 +442,7 @@ class DeveloperLogStore:
             return None
         try:
             ride_dicts = load_ride_entries()
-            access_dicts = load_access_entries()
+            access_dicts = self._with_unsaved_access_locked(load_access_entries())
             request_dicts = load_request_entries()
             return {
                 "ts": _now_ts(),
@@ -413,17 +454,16 @@ class DeveloperLogStore:
             print(f"Developer logs: snapshot from DB failed: {e}")
             return None
 
+    def _with_unsaved_access_locked(self, access_dicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Access entries from the DB (oldest first) plus this process's not-yet-persisted ones."""
+        if not self._access_unsaved:
+            return access_dicts
+        saved_ids = {d.get("id") for d in access_dicts}
+        return access_dicts + [d for d in self._access_unsaved.values() if d["id"] not in saved_ids]
+
     def _broadcast_locked(self) -> None:
         data = self._snapshot_from_db_if_postgres() or self._snapshot_locked()
-        payload = json.dumps({"type": "snapshot", "data": data})
-        dead: List[queue.Queue[str]] = []
-        for q in self._subscribers:
-            try:
-                q.put_nowait(payload)
-            except Exception:
-                dead.append(q)
-        if dead:
-            self._subscribers = [s for s in self._subscribers if s not in dead]
+        self.channel.publish(orjson.dumps({"type": "snapshot", "data": data}))
 
     def _snapshot_locked(self) -> Dict[str, Any]:
         return {
@@ -436,3 +476,4 @@ class DeveloperLogStore:
 
 # Singleton used by API and orchestrator
 developer_logs = DeveloperLogStore()
+atexit.register(developer_logs.flush_access)
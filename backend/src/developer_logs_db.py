@@ -159,6 +159,25 @@ def insert_access(entry: Dict[str, Any], db_path: Optional[Path] = None) -> None
         conn.commit()
 
 
+def insert_access_many(entries: List[Dict[str, Any]], db_path: Optional[Path] = None) -> None:
+    """Insert several access log entries in one transaction."""
+    if not entries:
+        return
+    conn = _get_connection(db_path)
+    with _lock:
+        conn.executemany(
+            """
+            INSERT INTO access_log (id, ip, user_agent, path, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (e["id"], e["ip"], e["user_agent"], e["path"], e["created_at"])
+                for e in entries
+            ],
+        )
+        conn.commit()
+
+
 def insert_request(entry: Dict[str, Any], db_path: Optional[Path] = None) -> None:
     """Insert a request log entry."""
     conn = _get_connection(db_path)
@@ -303,6 +322,7 @@ if _postgres_url:
             insert_ride as _pg_insert_ride,
             update_ride_cancelled as _pg_update_ride_cancelled,
             insert_access as _pg_insert_access,
+            insert_access_many as _pg_insert_access_many,
             load_ride_entries as _pg_load_ride_entries,
             load_access_entries as _pg_load_access_entries,
             insert_request as _pg_insert_request,
@@ -327,6 +347,9 @@ if _postgres_url:
         def insert_access(entry: Dict[str, Any], db_path: Optional[Path] = None) -> None:
             _pg_insert_access(entry)
 
+        def insert_access_many(entries: List[Dict[str, Any]], db_path: Optional[Path] = None) -> None:
+            _pg_insert_access_many(entries)
+
         def load_ride_entries(db_path: Optional[Path] = None) -> List[Dict[str, Any]]:
             return _pg_load_ride_entries()
 
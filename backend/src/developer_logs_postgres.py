@@ -11,10 +11,11 @@ from typing import Any, Dict, List
 
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, execute_values
 except ImportError:
     psycopg2 = None
     RealDictCursor = None
+    execute_values = None
 
 # Query params psycopg2 accepts in a URI (others, e.g. Supabase "supa", cause invalid dsn).
 _PSYCOPG2_URI_PARAMS = frozenset(
@@ -160,6 +161,22 @@ def insert_access(entry: Dict[str, Any]) -> None:
         conn.commit()
 
 
+def insert_access_many(entries: List[Dict[str, Any]]) -> None:
+    if not entries:
+        return
+    with _conn() as conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                "INSERT INTO access_log (id, ip, user_agent, path, created_at) VALUES %s",
+                [
+                    (e["id"], e["ip"], e["user_agent"], e["path"], e["created_at"])
+                    for e in entries
+                ],
+            )
+        conn.commit()
+
+
 def load_ride_entries() -> List[Dict[str, Any]]:
     with _conn() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -49,7 +49,7 @@ def display_available_rides(search_response):
         if eta_ts:
             try:
                 eta_time = datetime.fromtimestamp(eta_ts).strftime("%I:%M %p")
-            except:
+            except Exception:
                 eta_time = "N/A"
         else:
             eta_time = "N/A"
@@ -2,8 +2,10 @@ import requests
 import json
 try:
     from src import config
+    from src.http_client import http_session
 except ImportError:
     import config
+    from http_client import http_session
 
 def get_route(route_identifier):
     """
@@ -58,7 +60,7 @@ def get_route(route_identifier):
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_session.post(url, json=payload, headers=headers)
         response.raise_for_status()
         
         print(f"Get Route Status Code: {response.status_code}")
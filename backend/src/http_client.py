@@ -0,0 +1,31 @@
+"""
+Shared HTTP session for outgoing API calls.
+
+requests.post()/get() build a throwaway Session per call, so every search,
+booking and cancellation paid a fresh TCP + TLS handshake. One module-level
+Session keeps connections alive in urllib3's pool and reuses them across
+requests and threads (including the orchestrator's parallel filler bookings).
+
+Cookies are never stored: calls are made on behalf of different users, and a
+cookie set in one user's response must not ride along on another user's request.
+
+The pool keeps up to POOL_MAXSIZE idle connections per host (urllib3's default
+is 10). Orchestrator runs fan out one request per filler account, several runs
+can be in flight at once, and any connection beyond the pool size would be
+closed after use instead of reused. No automatic retries are configured here:
+booking and cancellation are POSTs, and search_ride does its own retrying.
+"""
+
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 20  # distinct hosts kept pooled
+POOL_MAXSIZE = 50  # connections kept per host
+
+http_session = requests.Session()
+http_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+http_session.mount(
+    "https://", HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+)
@@ -1,13 +1,23 @@
 """
 Logging module for RideSmart application.
 Logs all booking actions, cancellations, and Lyft orchestrator activities.
+
+Entries are serialized by the caller and appended to the log files by a single
+background writer thread, so request handlers and the orchestrator never wait
+on file I/O. Entries that queue up while a write is in progress go out together
+with one open + write per file. If the queue is full (the disk is stalled), entries are dropped
+and counted rather than blocking the caller.
 """
 
+import atexit
 import os
 import json
+import queue
 from datetime import datetime
 from pathlib import Path
 
+from src.background import LazyThread
+
 # Get the backend directory
 BACKEND_DIR = Path(__file__).parent.parent
 LOGS_DIR = BACKEND_DIR / 'logs'
@@ -33,21 +43,109 @@ def _get_timestamp():
     return datetime.now().isoformat()
 
 
+# Pending (log_file, line) pairs for the writer thread.
+_LOG_QUEUE = queue.Queue(maxsize=10000)
+dropped_log_entries = 0
+
+
+# Most lines handed to one write() per file by the writer thread.
+_MAX_BATCH = 256
+
+# Queued by _drain at exit to make the writer finish its batch and return.
+_STOP = object()
+# Seconds _drain waits for the writer before giving up on the rest of the queue.
+_DRAIN_TIMEOUT = 5
+
+
+def _append_lines(log_file, lines):
+    try:
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+    except Exception as e:
+        print(f"Error writing to log file {log_file}: {e}")
+
+
+def _write_batch(batch):
+    """Append queued (log_file, line) pairs with one open + write per file, keeping order."""
+    by_file = {}
+    for log_file, line in batch:
+        by_file.setdefault(log_file, []).append(line)
+    for log_file, lines in by_file.items():
+        _append_lines(log_file, lines)
+
+
+def _writer_loop():
+    while True:
+        # Block for the first entry, then take whatever else is already queued.
+        batch = []
+        item = _LOG_QUEUE.get()
+        while item is not _STOP:
+            batch.append(item)
+            if len(batch) >= _MAX_BATCH:
+                break
+            try:
+                item = _LOG_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+        _write_batch(batch)
+        if item is _STOP:
+            return
+
+
+_writer = LazyThread(_writer_loop, "log-writer")
+
+
+@atexit.register
+def _drain():
+    """
+    Write whatever is still queued when the process exits.
+
+    The writer is stopped first (it finishes the batch it holds, then exits) so
+    the remaining lines are not written concurrently with, or lost behind, it.
+    """
+    if not _writer.join(timeout=0):
+        try:
+            _LOG_QUEUE.put(_STOP, timeout=_DRAIN_TIMEOUT)
+        except queue.Full:
+            pass
+        if not _writer.join(timeout=_DRAIN_TIMEOUT):
+            print("Log writer did not stop; leaving queued log entries unwritten")
+            return
+    batch = []
+    while True:
+        try:
+            item = _LOG_QUEUE.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _STOP:
+            batch.append(item)
+    _write_batch(batch)
+
+
 def _write_log(log_file, log_entry):
     """
-    Write a log entry to a file.
+    Queue a log entry to be appended to a file by the writer thread.
+    
+    The entry is serialized here, so later changes to the caller's objects
+    cannot leak into the log line.
     
     Args:
         log_file: Path to the log file (or None if logging disabled, e.g. on Vercel)
         log_entry: dict with log data
     """
+    global dropped_log_entries
     if log_file is None:
         return
     try:
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+        line = json.dumps(log_entry, ensure_ascii=False) + '\n'
     except Exception as e:
-        print(f"Error writing to log file {log_file}: {e}")
+        print(f"Error serializing log entry for {log_file}: {e}")
+        return
+    _writer.ensure_started()
+    try:
+        _LOG_QUEUE.put_nowait((log_file, line))
+    except queue.Full:
+        dropped_log_entries += 1
 
 
 def log_booking(action, user_key, user_name=None, **kwargs):
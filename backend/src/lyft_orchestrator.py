@@ -7,16 +7,15 @@ This module handles the logic for getting a Lyft ride by:
 3. All filler bookings are then cancelled
 """
 
-import json
 import time
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from src.search_ride import search_ride
-from src.book_ride import book_ride
+from src.search_ride import search_ride, is_lyft_proposal, classify_proposals
+from src.book_ride import book_ride, booked_ride_id
 from src.cancel_ride import cancel_ride
-from src.users import USERS, get_auth_token, get_user_id, list_users
+from src.users import USERS, get_user_credentials, list_users
 from src.logger import log_lyft_orchestrator
 from src.booking_state import booking_state
 from src.developer_logs import developer_logs
@@ -90,8 +89,7 @@ class LyftOrchestrator:
                 booking_state.set_status(user_key, "searching", "searching for rides...")
             except Exception:
                 pass
-            auth_token = get_auth_token(user_key)
-            user_id = get_user_id(user_key)
+            auth_token, user_id = get_user_credentials(user_key)
             
             response = search_ride(
                 origin=self.route_origin,
@@ -115,18 +113,7 @@ class LyftOrchestrator:
             proposals = response.get('proposals', [])
             
             # Separate Lyft and RideSmart proposals
-            lyft_proposals = []
-            ridesmart_proposals = []
-            
-            for p in proposals:
-                # Simple approach: scan the entire proposal for "lyft" anywhere
-                proposal_str = json.dumps(p).lower()
-                is_lyft = 'lyft' in proposal_str
-                
-                if is_lyft:
-                    lyft_proposals.append(p)
-                else:
-                    ridesmart_proposals.append(p)
+            lyft_proposals, ridesmart_proposals = classify_proposals(proposals)
             
             out = {
                 'proposals': proposals,
@@ -165,9 +152,7 @@ class LyftOrchestrator:
         dropoff_desc = dropoff_loc.get('short_description') or dropoff_loc.get('description', 'Unknown')
         
         # Check if it's Lyft
-        proposal_str = json.dumps(proposal).lower()
-        is_lyft = 'lyft' in proposal_str
-        ride_type = "Lyft" if is_lyft else "RideSmart"
+        ride_type = "Lyft" if is_lyft_proposal(proposal) else "RideSmart"
         
         return {
             'type': ride_type,
@@ -204,10 +189,7 @@ class LyftOrchestrator:
         booking = self._book_ride(self.original_user_key, lyft_proposal)
 
         if booking and not (isinstance(booking, dict) and booking.get('success') is False):
-            ride_id = None
-            rides = booking.get('prescheduled_recurring_series_rides', [])
-            if rides:
-                ride_id = rides[0].get('id')
+            ride_id = booked_ride_id(booking)
 
             if ride_id:
                 self.original_lyft_booking = {
@@ -279,8 +261,7 @@ class LyftOrchestrator:
                 booking_state.set_status(user_key, "booking", "booking ride...")
             except Exception:
                 pass
-            auth_token = get_auth_token(user_key)
-            user_id = get_user_id(user_key)
+            auth_token, user_id = get_user_credentials(user_key)
             
             response = book_ride(
                 prescheduled_ride_id=proposal.get('prescheduled_ride_id'),
@@ -323,8 +304,7 @@ class LyftOrchestrator:
     
     def _cancel_ride(self, user_key, ride_id):
         """Cancel a ride as a specific user."""
-        auth_token = get_auth_token(user_key)
-        user_id = get_user_id(user_key)
+        auth_token, user_id = get_user_credentials(user_key)
         
         response = cancel_ride(
             ride_id=ride_id,
@@ -667,10 +647,7 @@ class LyftOrchestrator:
                     booking = self._book_ride(filler_key, proposal)
 
                     if booking and not (isinstance(booking, dict) and booking.get('success') is False):
-                        ride_id = None
-                        rides = booking.get('prescheduled_recurring_series_rides', [])
-                        if rides:
-                            ride_id = rides[0].get('id')
+                        ride_id = booked_ride_id(booking)
                         prescheduled_ride_id = proposal.get('prescheduled_ride_id')
 
                         entry = {
@@ -1,6 +1,11 @@
 import requests
 import time
 
+try:
+    from src.http_client import http_session
+except ImportError:
+    from http_client import http_session
+
 _NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
 _USER_AGENT = "RideSmart/1.0"
 _last_request_time = 0.0
@@ -39,7 +44,7 @@ def reverse_geocode(lat: float, lng: float) -> dict | None:
 
     try:
         _last_request_time = time.time()
-        resp = requests.get(_NOMINATIM_URL, params=params, headers=headers, timeout=10)
+        resp = http_session.get(_NOMINATIM_URL, params=params, headers=headers, timeout=10)
         resp.raise_for_status()
         data = resp.json()
 
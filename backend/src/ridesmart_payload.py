@@ -0,0 +1,86 @@
+"""
+Shared pieces of the RideSmart request payloads (search_ride, book_ride).
+
+The constants are built once and only ever serialized, never mutated, so every
+payload references the same objects. Anything that depends on config is built
+per call by the helpers below, so changing config at runtime (from a shell or a
+test) still changes the next payload.
+"""
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+
+CLIENT_SPEC = {
+    "client_version": {
+        "major_version": "4.22.9",
+        "minor_version": "8"
+    },
+    "client_os_version": "26.3",
+    "client_os": 0,
+    "client_type": 0,
+    "app_name": "RideSmart",
+    "device_name": "iPhone",
+    "device_model": "iPhone16,1",
+    "device_id": "2C33CDBD-5C95-4F2B-9393-C96A9F142A30",
+    "app_id": "UniversityOfChicagoRider"
+}
+
+SUB_SERVICES = [
+    "U_Chicago_Safe_Ride"
+]
+
+RIDE_DETAILS = {
+    "display_time": []
+}
+
+SEARCH_SUPPORTED_FEATURES = [
+    "MULTIPLE_PROPOSALS",
+    "UNAVAILABLE_PROVIDERS",
+    "PUBLIC_TRANSPORT",
+    "PUBLIC_TRANSPORT_BUY_TICKET",
+    "PREBOOKING_RIDE_SUPPLIER",
+    "PREBOOKING_INTER_MODAL",
+    "INTERMODAL_SECOND_LEG",
+    "GENERIC_PROPOSALS",
+    "NOW_LATER",
+    "AUTONOMOUS_VEHICLE",
+    "THIRD_PARTY",
+    "RECURRING_INTERMODAL"
+]
+
+BOOK_SUPPORTED_FEATURES = [
+    "INTERMODAL_SECOND_LEG",
+    "RECURRING_INTERMODAL"
+]
+
+JSON_HEADERS = {
+    "Content-Type": "application/json"
+}
+
+# The rider themself; always exactly one passenger.
+_ME_PLUS_ONE = {
+    "id": 6261,
+    "maximum_passengers_count": 1,
+    "minimum_passengers_count": 1,
+    "current_passengers_count": 1,
+    "title": "Me",
+    "is_item": False
+}
+
+
+def plus_one_types():
+    """Passenger types for a payload; the extra rider follows config.include_extra_rider."""
+    return [
+        _ME_PLUS_ONE,
+        {
+            "id": 6263,
+            "maximum_passengers_count": 1,
+            "minimum_passengers_count": 0,
+            "title": "Extra Rider",
+            "current_passengers_count": 1 if config.include_extra_rider else 0,
+            "is_item": False
+        }
+    ]
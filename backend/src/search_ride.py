@@ -1,10 +1,45 @@
 import requests
 import json
+import re
 import time
+import orjson
 try:
     from src import config
+    from src.http_client import http_session
+    from src import ridesmart_payload
 except ImportError:
     import config
+    from http_client import http_session
+    import ridesmart_payload
+
+
+_LYFT_RE = re.compile(rb"lyft", re.IGNORECASE)
+
+def is_lyft_proposal(proposal):
+    """
+    Return True if "lyft" appears anywhere in the proposal (keys or values, any case).
+
+    The proposal is encoded once with orjson and scanned as bytes with a compiled
+    case-insensitive pattern, so there is no Python str and no lowercased copy.
+    """
+    return _LYFT_RE.search(orjson.dumps(proposal)) is not None
+
+
+def classify_proposals(proposals):
+    """
+    Split proposals into (lyft_proposals, ridesmart_proposals), using the same
+    "lyft anywhere" test as is_lyft_proposal.
+
+    The whole list is scanned once first; when "lyft" appears nowhere (the usual
+    case) every proposal is RideSmart and none has to be encoded on its own.
+    """
+    if _LYFT_RE.search(orjson.dumps(proposals)) is None:
+        return [], list(proposals)
+    lyft, ridesmart = [], []
+    for proposal in proposals:
+        (lyft if is_lyft_proposal(proposal) else ridesmart).append(proposal)
+    return lyft, ridesmart
+
 
 def search_ride(origin=None, destination=None, auth_token=None, user_id=None):
     """
@@ -34,28 +69,18 @@ def search_ride(origin=None, destination=None, auth_token=None, user_id=None):
     # API endpoint
     url = "https://router-ucaca.live.ridewithvia.com/ops/rider/proposal/prescheduled/recurring/validate"
     
-    # JSON payload
+    # One timestamp for client_ts and end_date_timestamp
+    now_ts = config.get_current_timestamp()
+
+    # JSON payload (constant parts are shared, see ridesmart_payload)
     payload = {
         "client_details": {
             "client_state": {
                 "charging": config.charging,
-                "client_ts": config.get_current_timestamp(),
+                "client_ts": now_ts,
                 "battery_level": config.battery_level
             },
-            "client_spec": {
-                "device_model": "iPhone16,1",
-                "app_id": "UniversityOfChicagoRider",
-                "app_name": "RideSmart",
-                "device_id": "2C33CDBD-5C95-4F2B-9393-C96A9F142A30",
-                "client_os": 0,
-                "device_name": "iPhone",
-                "client_os_version": "26.3",
-                "client_version": {
-                    "major_version": "4.22.9",
-                    "minor_version": "8"
-                },
-                "client_type": 0
-            }
+            "client_spec": ridesmart_payload.CLIENT_SPEC
         },
         "whos_asking": {
             "auth_token": auth_token,
@@ -63,49 +88,15 @@ def search_ride(origin=None, destination=None, auth_token=None, user_id=None):
             "acct_type": 0
         },
         "prescheduled_recurring_series_id": 0,
-        "sub_services": [
-            "U_Chicago_Safe_Ride"
-        ],
+        "sub_services": ridesmart_payload.SUB_SERVICES,
         "id": 0,
-        "supported_features": [
-            "MULTIPLE_PROPOSALS",
-            "UNAVAILABLE_PROVIDERS",
-            "PUBLIC_TRANSPORT",
-            "PUBLIC_TRANSPORT_BUY_TICKET",
-            "PREBOOKING_RIDE_SUPPLIER",
-            "PREBOOKING_INTER_MODAL",
-            "INTERMODAL_SECOND_LEG",
-            "GENERIC_PROPOSALS",
-            "NOW_LATER",
-            "AUTONOMOUS_VEHICLE",
-            "THIRD_PARTY",
-            "RECURRING_INTERMODAL"
-        ],
-        "end_date_timestamp": config.get_current_timestamp(),
-        "prescheduled_recurring_series_ride_details": {
-            "display_time": []
-        },
+        "supported_features": ridesmart_payload.SEARCH_SUPPORTED_FEATURES,
+        "end_date_timestamp": now_ts,
+        "prescheduled_recurring_series_ride_details": ridesmart_payload.RIDE_DETAILS,
         "prescheduled_recurring_series_details": {
             "origin": origin,
             "recurring_series_type": "OT",
-            "plus_one_types": [
-                {
-                    "is_item": False,
-                    "current_passengers_count": 1,
-                    "minimum_passengers_count": 1,
-                    "title": "Me",
-                    "id": 6261,
-                    "maximum_passengers_count": 1
-                },
-                {
-                    "is_item": False,
-                    "current_passengers_count": 1 if config.include_extra_rider else 0,
-                    "minimum_passengers_count": 0,
-                    "title": "Extra Rider",
-                    "id": 6263,
-                    "maximum_passengers_count": 1
-                }
-            ],
+            "plus_one_types": ridesmart_payload.plus_one_types(),
             "destination": destination,
             "n_passengers": config.n_passengers
         },
@@ -114,17 +105,12 @@ def search_ride(origin=None, destination=None, auth_token=None, user_id=None):
         "city_id": 783
     }
     
-    # Headers
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
     try:
         # Make POST request with JSON data (always with a timeout + small retries).
         max_attempts = 3
         for attempt in range(1, max_attempts + 1):
             try:
-                response = requests.post(url, json=payload, headers=headers, timeout=(5, 20))
+                response = http_session.post(url, json=payload, headers=ridesmart_payload.JSON_HEADERS, timeout=(5, 20))
                 break
             except requests.exceptions.RequestException as e:
                 if attempt < max_attempts:
@@ -140,7 +126,9 @@ def search_ride(origin=None, destination=None, auth_token=None, user_id=None):
         
         # Try to pretty print JSON response
         try:
-            response_json = response.json()
+            # orjson parses the raw body bytes directly (no text decode, C parser);
+            # its JSONDecodeError is a ValueError like response.json()'s.
+            response_json = orjson.loads(response.content)
             
             # Filter out public transport proposals
             if "proposals" in response_json:
@@ -126,6 +126,19 @@ def get_user_id(user_key=None):
     return None
 
 
+def get_user_credentials(user_key=None):
+    """
+    Get (auth_token, user_id) for a specific user with a single USERS lookup.
+
+    Returns:
+        tuple (auth_token, user_id), or (None, None) if the user is not found
+    """
+    user = get_user(user_key)
+    if user:
+        return user.get("auth_token"), user.get("user_id")
+    return None, None
+
+
 def list_users():
     """List all available users for the frontend."""
     return [
@@ -60,6 +60,49 @@ class StatusEndpointsTest(unittest.TestCase):
         self.assertIn("matthew", keys)
         self.assertIn("charles", keys)
 
+    def test_status_etag_and_long_poll(self):
+        # Let any publish still pending from earlier tests land first.
+        time.sleep(self.booking_state.publish_window * 3)
+        res = self.client.get("/api/status")
+        etag = res.headers.get("ETag")
+        self.assertTrue(etag)
+
+        res = self.client.get("/api/status", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+
+        # Long-poll wakes up once the (coalesced) status publish lands.
+        self.booking_state.set_status("charles", "searching", "long-poll test")
+        res = self.client.get("/api/status?wait=3", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers.get("ETag"), etag)
+        charles = next(u for u in res.get_json()["users"] if u["user_key"] == "charles")
+        self.assertEqual(charles["message"], "long-poll test")
+        self.booking_state.set_status("charles", "idle")
+
+    def test_status_long_poll_rejects_unbounded_wait(self):
+        time.sleep(self.booking_state.publish_window * 3)
+        etag = self.client.get("/api/status").headers.get("ETag")
+        for wait in ("nan", "inf"):
+            start = time.time()
+            res = self.client.get(f"/api/status?wait={wait}", headers={"If-None-Match": etag})
+            self.assertEqual(res.status_code, 400)
+            self.assertLess(time.time() - start, 1)
+
+        start = time.time()
+        res = self.client.get("/api/status?wait=-1", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertLess(time.time() - start, 1)
+
+    def test_encoded_snapshot_is_reused_until_a_mutation(self):
+        first = self.booking_state.encode_snapshot()
+        self.assertIs(self.booking_state.encode_snapshot(), first)
+
+        self.booking_state.set_status("charles", "searching", "cache test")
+        second = self.booking_state.encode_snapshot()
+        self.assertIsNot(second, first)
+        self.assertIn("cache test", json.loads(second)["data"]["users"][0]["message"])
+        self.booking_state.set_status("charles", "idle")
+
     def test_status_stream_sends_updates(self):
         # Open stream (first message should be a snapshot)
         resp = self.client.get("/api/status/stream", buffered=False)
@@ -120,6 +163,158 @@ class StatusEndpointsTest(unittest.TestCase):
         finally:
             self.api.book_ride = original_book_ride
 
+    def test_static_endpoints_honor_if_none_match(self):
+        for path in ("/", "/api/config", "/api/routes", "/api/users"):
+            res = self.client.get(path)
+            self.assertEqual(res.status_code, 200)
+            etag = res.headers.get("ETag")
+            self.assertTrue(etag)
+            self.assertIn("max-age", res.headers.get("Cache-Control", ""))
+
+            res = self.client.get(path, headers={"If-None-Match": etag})
+            self.assertEqual(res.status_code, 304)
+            self.assertEqual(res.data, b"")
+
+    def test_reload_static_payloads_picks_up_new_routes(self):
+        from src import destination_config
+
+        etag = self.client.get("/api/routes").headers.get("ETag")
+        destination_config.LOCATIONS["test_a_to_test_b"] = {
+            "origin": {"latlng": {"lat": 1.0, "lng": 2.0}, "geocoded_addr": "", "full_geocoded_addr": ""},
+            "destination": {"latlng": {"lat": 3.0, "lng": 4.0}, "geocoded_addr": "", "full_geocoded_addr": ""},
+        }
+        try:
+            self.api.reload_static_payloads()
+            res = self.client.get("/api/routes", headers={"If-None-Match": etag})
+            self.assertEqual(res.status_code, 200)
+            routes = {r["id"]: r for r in res.get_json()["routes"]}
+            self.assertEqual(routes["test_a_to_test_b"]["destination"]["name"], "Test B")
+        finally:
+            del destination_config.LOCATIONS["test_a_to_test_b"]
+            self.api.reload_static_payloads()
+
+        self.assertEqual(self.client.get("/api/routes").headers.get("ETag"), etag)
+
+    def test_lyft_run_job_can_be_polled(self):
+        # Monkeypatch the orchestrator so the run finishes immediately without network.
+        from src import lyft_orchestrator
+
+        original_orchestrator = lyft_orchestrator.LyftOrchestrator
+        try:
+            class FakeOrchestrator:
+                def __init__(self, user_key, origin, destination, log_callback=None):
+                    self.log_callback = log_callback
+                    self.filler_bookings = []
+                    self.original_lyft_booking = None
+
+                def run(self):
+                    self.log_callback("fake run")
+                    return {"success": True, "message": "done"}
+
+            lyft_orchestrator.LyftOrchestrator = FakeOrchestrator
+
+            res = self.client.post("/api/lyft/run", json={"original_user": "matthew", "route_id": "i_house_to_cathey"})
+            self.assertEqual(res.status_code, 200)
+            job_id = res.headers.get("X-Job-Id")
+            self.assertTrue(job_id)
+            self.assertIn('"type":"result"', res.get_data(as_text=True))
+
+            status = self.client.get(f"/api/lyft/status/{job_id}").get_json()
+            self.assertTrue(status["done"])
+            self.assertEqual(status["status"], "result")
+            self.assertEqual(status["outcome"]["message"], "done")
+
+            self.assertEqual(self.client.get("/api/lyft/status/missing").status_code, 404)
+        finally:
+            lyft_orchestrator.LyftOrchestrator = original_orchestrator
+
+    def test_lyft_run_refused_when_orchestrators_busy(self):
+        slots = self.api._orchestrator_slots
+        for _ in range(self.api._MAX_ORCHESTRATOR_RUNS):
+            slots.acquire()
+        try:
+            res = self.client.post("/api/lyft/run", json={"original_user": "matthew", "route_id": "i_house_to_cathey"})
+            self.assertEqual(res.status_code, 503)
+            self.assertEqual(res.get_json(), {"error": "busy"})
+            self.assertTrue(res.headers.get("Retry-After"))
+        finally:
+            for _ in range(self.api._MAX_ORCHESTRATOR_RUNS):
+                slots.release()
+
+    def test_lyft_check_reuses_recent_search(self):
+        calls = []
+
+        def fake_search_ride(origin, destination, auth_token=None, user_id=None):
+            calls.append(user_id)
+            return {"proposals": [{"type": "lyft_ride"}, {"type": "regular"}]}
+
+        original_search_ride = self.api.search_ride
+        self.api.search_ride = fake_search_ride
+        self.api._lyft_check_cache.clear()
+        try:
+            body = {"user_id": "matthew", "route_id": "i_house_to_cathey"}
+            first = self.client.post("/api/lyft/check", json=body).get_json()
+            second = self.client.post("/api/lyft/check", json=body).get_json()
+            self.assertEqual(first, second)
+            self.assertEqual(first["lyft_count"], 1)
+            self.assertEqual(len(calls), 1)
+
+            # A different user searches separately.
+            self.client.post("/api/lyft/check", json={"user_id": "charles", "route_id": "i_house_to_cathey"})
+            self.assertEqual(len(calls), 2)
+        finally:
+            self.api.search_ride = original_search_ride
+            self.api._lyft_check_cache.clear()
+
+    def test_access_log_is_persisted_in_batches(self):
+        from src.developer_logs import developer_logs
+        from src.developer_logs_db import load_access_entries
+
+        res = self.client.get("/api/developer/access?path=/batch-test")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(developer_logs.get_access_log()[0]["path"], "/batch-test")
+
+        developer_logs.flush_access()
+        persisted = {e["id"] for e in load_access_entries()}
+        self.assertIn(developer_logs.get_access_log()[0]["id"], persisted)
+
+    def test_log_drain_stops_writer_before_writing_the_rest(self):
+        import tempfile
+        from src import logger
+
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "drain.log")
+            for i in range(1000):
+                logger._write_log(log_file, {"n": i})
+            logger._drain()
+            self.assertTrue(logger._writer.join(timeout=0))
+            with open(log_file, encoding="utf-8") as f:
+                numbers = [json.loads(line)["n"] for line in f]
+        self.assertEqual(numbers, list(range(1000)))
+
+    def test_failed_access_batch_falls_back_to_single_inserts(self):
+        from src import developer_logs as developer_logs_module
+        from src.developer_logs_db import load_access_entries
+
+        store = developer_logs_module.developer_logs
+        seq = store.channel.seq
+        self.client.get("/api/developer/access?path=/fallback-test")
+        # Broadcast right away, without waiting for the flush.
+        self.assertGreater(store.channel.seq, seq)
+
+        def failing_insert_many(entries, db_path=None):
+            raise RuntimeError("batch insert failed")
+
+        original_insert_many = developer_logs_module.insert_access_many
+        developer_logs_module.insert_access_many = failing_insert_many
+        try:
+            store.flush_access()
+        finally:
+            developer_logs_module.insert_access_many = original_insert_many
+
+        persisted = {e["id"] for e in load_access_entries()}
+        self.assertIn(store.get_access_log()[0]["id"], persisted)
+
 
 if __name__ == "__main__":
     unittest.main()
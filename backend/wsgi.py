@@ -0,0 +1,17 @@
+"""
+Production WSGI entrypoint for gunicorn with gevent workers.
+
+    gunicorn --timeout 60 wsgi:app
+
+(worker class, worker count and connections come from gunicorn.conf.py).
+
+Every endpoint spends its time waiting on the RideSmart API (search/book/cancel,
+the Lyft orchestrator) or holding an SSE stream open. Monkey-patching the stdlib
+before api (and requests/urllib3) is imported makes those socket waits yield to
+other greenlets, so one worker serves many requests concurrently.
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+from api import app  # noqa: E402